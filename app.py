@@ -1,8 +1,18 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from src.GenerateHistory.Generate.run_history import PDFEducationalStoryGenerator
 from src.GenerateHistory.Generate.run_history_image import StoryToImagePromptPipeline
 from src.GenerateHistory.Generate.run_image import StoryImagePipeline
 from src.general.ModelVoiceGenerator.model_voice_generator import VoiceGenerator
+from src.general.Cache.pdf_text_cache import PDFTextCache
+from src.general.Cache.llm_cache import LLMResponseCache
+from src.general.Cache.image_cache import ImageCache
+from src.general.Cache.tts_cache import TTSCache
+from src.general.TokenCounter.token_counter import token_usage
+from src.general.Concurrency.provider_limiter import DEFAULT_PROVIDER_LIMITS
+from src.general.BlobStore.blob_store import BlobStore
+from src.general.ImageProcessing.image_variants import ImageVariantProcessor, PILLOW_AVAILABLE
+from src.general.Embedding.prompt_index import SimilarPromptIndex
 
 
 def save_json(output_data, filename="output.json"):
@@ -17,23 +27,50 @@ def save_json(output_data, filename="output.json"):
     print(f"Estrutura final salva em {filename}")
 
 
-def main(pdf_filename: str, language: str = "inglês", region_name: str = "us-east-1"):
+def report_audio_cache(tts_cache):
+    """
+    Exibe quantos áudios foram reaproveitados do cache de áudios nesta execução.
+    
+    :param tts_cache: O cache de áudios usado pelo gerador de voz.
+    """
+    audio_stats = tts_cache.stats()
+    print(f"Áudios reaproveitados do cache: {audio_stats['hits']} de {audio_stats['hits'] + audio_stats['misses']} "
+          f"({audio_stats['hit_ratio']:.0%})")
+
+
+def inline_images(stories, blob_store):
+    """
+    Substitui as referências de imagem {hash, size, mime} pelo conteúdo em base64, para clientes que
+    precisam da imagem embutida no JSON. É a única etapa do pipeline que gera o base64 das imagens.
+    
+    :param stories: As histórias com o campo 'img' contendo referências do BlobStore.
+    :param blob_store: O armazenamento onde as imagens foram gravadas.
+    :return: Novas histórias com o campo 'img' em base64.
+    """
+    return [dict(story, img=blob_store.to_base64(story['img'])) for story in stories]
+
+
+def main(pdf_filename: str, language: str = "inglês", region_name: str = "us-east-1", embed_images: bool = False):
     """
     Função principal que executa todo o pipeline do projeto:
     1. Extrai o texto de um PDF e gera as partes da história.
     2. Gera prompts de imagem para cada parte da história.
-    3. Gera imagens baseadas nos prompts e converte-as para base64.
+    3. Gera imagens baseadas nos prompts e grava-as no BlobStore.
     4. Gera o áudio para cada história e adiciona à estrutura.
     
     :param pdf_filename: Caminho para o arquivo PDF.
     :param language: Idioma escolhido para os prompts de imagem (padrão: "inglês").
     :param region_name: Região do gerador de imagens (padrão: "us-east-1").
-    :return: Estrutura final contendo as histórias, imagens e áudios em base64.
+    :param embed_images: Se True, as imagens são devolvidas em base64; caso contrário, como referências {hash, size, mime}.
+    :return: Estrutura final contendo as histórias, as imagens e os áudios em base64.
     """
     
+    # Cache das respostas do Claude 3 compartilhado pelas etapas de texto
+    llm_cache = LLMResponseCache()
+
     # Etapa 1: Extrai o texto do PDF e gera as histórias
     print("Iniciando extração e geração das histórias a partir do PDF...")
-    story_generator = PDFEducationalStoryGenerator(pdf_filename)
+    story_generator = PDFEducationalStoryGenerator(pdf_filename, text_cache=PDFTextCache(), llm_cache=llm_cache)
     story_structure = story_generator.run_pipeline()
 
     # Exibe a estrutura retornada após a geração das histórias
@@ -44,8 +81,8 @@ def main(pdf_filename: str, language: str = "inglês", region_name: str = "us-ea
 
     # Etapa 2: Gera prompts de imagem para cada parte da história
     print("Gerando prompts de imagem para as histórias...")
-    story_pipeline = StoryToImagePromptPipeline(story_structure, language)
-    results = story_pipeline.process_story_parts()
+    story_pipeline = StoryToImagePromptPipeline(story_structure, language, llm_cache=llm_cache)
+    results = story_pipeline.process_story_parts_batched()
 
     # Exibe os prompts gerados para as imagens
     print("\nPrompts de imagem gerados:")
@@ -53,26 +90,111 @@ def main(pdf_filename: str, language: str = "inglês", region_name: str = "us-ea
         print(f"História: {result['story']}")
         print(f"Prompt gerado para imagem: {result['prompt_img']}\n")
 
-    # Etapa 3: Gera imagens em base64 com base nos prompts de imagem
-    print("Gerando imagens em base64 a partir dos prompts...")
-    story_image_pipeline = StoryImagePipeline(results, region_name=region_name)
+    # Etapa 3: Gera imagens com base nos prompts de imagem e grava-as no BlobStore
+    print("Gerando imagens a partir dos prompts...")
+    blob_store = BlobStore()
+    prompt_index = SimilarPromptIndex()
+    story_image_pipeline = StoryImagePipeline(
+        results, region_name=region_name, max_in_flight=DEFAULT_PROVIDER_LIMITS["bedrock-stable-diffusion"],
+        blob_store=blob_store, image_cache=ImageCache(), prompt_index=prompt_index
+    )
     updated_stories = story_image_pipeline.process_images()
-
-    # Exibe as histórias finais com as imagens em base64
-    print("\nHistórias finais com imagens em base64:")
+    for failure in story_image_pipeline.failures:
+        print(f"Imagem da parte {failure['part']} não gerada: {failure['error']}")
+    prompt_stats = prompt_index.stats()
+    print(f"Imagens reaproveitadas por similaridade: {prompt_stats['hits']} de {prompt_stats['lookups']} "
+          f"(limiar {prompt_stats['threshold']}, histograma: {prompt_stats['similarity_histogram']})")
+
+    # Etapa 3b: Gera as variantes comprimidas (miniatura e exibição) das imagens, se o Pillow estiver instalado
+    if PILLOW_AVAILABLE:
+        print("Gerando as variantes das imagens...")
+        updated_stories = ImageVariantProcessor(blob_store=blob_store).process_stories(updated_stories)
+    else:
+        print("Pillow não instalado; variantes das imagens não geradas.")
+
+    # Exibe as histórias finais com as referências das imagens
+    print("\nHistórias finais com imagens:")
     for story in updated_stories:
         print(f"História: {story['story']}")
-        print(f"Imagem gerada (base64): {story['img'][:50]}... [truncated]\n")
+        print(f"Imagem gerada: {blob_store.path(story['img'])} ({story['img']['size']} bytes)\n")
 
     # Etapa 4: Gera o áudio para cada história e adiciona à estrutura
     print("Gerando áudios em base64 para cada história...")
-    voice_generator = VoiceGenerator(api_key="")
+    voice_generator = VoiceGenerator(api_key="", cache=TTSCache())
     updated_stories_with_audio = voice_generator.process_story_structure(updated_stories)
+    report_audio_cache(voice_generator.cache)
 
-    # Retorna a estrutura final contendo as histórias, imagens e áudios gerados em base64
+    # Exibe os tokens consumidos e a latência de cada etapa
+    print("\nTokens e latência por etapa:")
+    token_usage.report()
+
+    # Retorna a estrutura final contendo as histórias, imagens e áudios gerados
+    if embed_images:
+        return inline_images(updated_stories_with_audio, blob_store)
     return updated_stories_with_audio
 
 
+def process_part_downstream(part, story_pipeline, image_pipeline, voice_generator, index=None):
+    """
+    Executa, para uma única parte da história, a geração do prompt de imagem, da imagem e do áudio.
+    
+    :param part: A parte da história produzida pelo gerador.
+    :param story_pipeline: O pipeline de prompts de imagem.
+    :param image_pipeline: O pipeline de imagens.
+    :param voice_generator: O gerador de voz.
+    :param index: O índice da parte (começando em 1), usado no registro de falhas da imagem.
+    :return: A parte com imagem e áudio em base64 (áudio None em caso de falha), ou None caso a imagem falhe.
+    """
+    prompt_result = story_pipeline.process_story_part(part)
+    if prompt_result is None:
+        return None
+    image_result = image_pipeline.process_image(prompt_result, index)
+    if image_result is None:
+        return None
+    return voice_generator.process_story_structure([image_result])[0]
+
+
+def main_streaming(pdf_filename: str, language: str = "inglês", region_name: str = "us-east-1", max_workers: int = 6,
+                   embed_images: bool = False):
+    """
+    Variante de main que usa a resposta em streaming do Claude 3: cada parte da história segue para
+    as etapas de prompt de imagem, imagem e áudio assim que é recebida, enquanto as demais partes
+    ainda estão sendo geradas.
+    
+    :param pdf_filename: Caminho para o arquivo PDF.
+    :param language: Idioma escolhido para os prompts de imagem (padrão: "inglês").
+    :param region_name: Região do gerador de imagens (padrão: "us-east-1").
+    :param max_workers: Número de partes processadas simultaneamente (padrão: 6).
+    :param embed_images: Se True, as imagens são devolvidas em base64; caso contrário, como referências {hash, size, mime}.
+    :return: Estrutura final contendo as histórias, as imagens e os áudios em base64, na ordem das partes.
+    """
+    llm_cache = LLMResponseCache()
+    story_generator = PDFEducationalStoryGenerator(pdf_filename, text_cache=PDFTextCache(), llm_cache=llm_cache)
+    story_pipeline = StoryToImagePromptPipeline([], language, llm_cache=llm_cache)
+    blob_store = BlobStore()
+    image_pipeline = StoryImagePipeline([], region_name=region_name, blob_store=blob_store, image_cache=ImageCache())
+    voice_generator = VoiceGenerator(api_key="", cache=TTSCache())
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(process_part_downstream, part, story_pipeline, image_pipeline, voice_generator, index)
+            for index, part in enumerate(story_generator.run_pipeline_streaming(), 1)
+        ]
+        results = [future.result() for future in futures]
+
+    for failure in sorted(image_pipeline.failures, key=lambda failure: failure['part']):
+        print(f"Imagem da parte {failure['part']} não gerada: {failure['error']}")
+    report_audio_cache(voice_generator.cache)
+
+    print("\nTokens e latência por etapa:")
+    token_usage.report()
+
+    results = [result for result in results if result is not None]
+    if embed_images:
+        return inline_images(results, blob_store)
+    return results
+
+
 if __name__ == "__main__":
     # Definir o caminho para o PDF
     pdf_filename = "./src/documents/sodapdf-converted.pdf"
@@ -83,9 +205,15 @@ if __name__ == "__main__":
     # Salva a estrutura final em um arquivo JSON
     save_json(final_structure, filename="output_with_audio.json")
 
+    # Salva os totais de tokens por etapa
+    token_usage.export("token_usage.json")
+
     # Exibe a estrutura final retornada pela main
     print("\nEstrutura final gerada pelo pipeline:")
     for item in final_structure:
         print(f"História: {item['story']}")
-        print(f"Imagem (base64): {item['img'][:50]}... [truncated]")
-        print(f"Áudio (base64): {item['audio'][:50]}... [truncated]\n")
+        print(f"Imagem: {item['img']}")
+        if item['audio'] is not None:
+            print(f"Áudio (base64): {item['audio'][:50]}... [truncated]\n")
+        else:
+            print(f"Áudio não gerado: {item['audio_error']}\n")
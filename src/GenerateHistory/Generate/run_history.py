@@ -1,9 +1,65 @@
+import asyncio
 import re
+from concurrent.futures import ThreadPoolExecutor
 from langdetect import detect, LangDetectException
 from src.general.PipelineHistory.pipeline_history import PDFTextProcessingPipeline
-from src.GenerateHistory.Prompts.generate_history import EducationalStoryPromptFormatter
+from src.general.Cache.pdf_text_cache import PDFTextCache, file_sha256
+from src.general.Cache.llm_cache import LLMResponseCache
+from src.GenerateHistory.Prompts.generate_history import EducationalStoryPromptFormatter, ChunkSummaryPromptFormatter
 from src.general.ModelTextGenerator.model_text_generator import Claude3SonnetInvoker
-from typing import List, Dict
+from src.general.Chunk.chunk import SentenceChunker
+from src.general.Embedding.embedding import ChunkVectorIndex
+from src.general.LanguageDetector.language_detector import SampledLanguageDetector, LANGDETECT_LOCK
+from src.general.TokenCounter.token_counter import (
+    BUDGET_CHARS_PER_TOKEN, CLAUDE3_CONTEXT_TOKENS, CONTEXT_SAFETY_FRACTION, estimate_tokens, estimate_prompt_tokens,
+    fit_to_token_budget
+)
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class IncrementalPartParser:
+    """
+    Classe responsável por extrair as tags <part> de uma resposta recebida em fragmentos (streaming).
+    Cada parte é devolvida assim que sua tag de fechamento chega, com o mesmo resultado de
+    re.findall(r'<part>(.*?)</part>', texto_completo, re.DOTALL).
+    
+    Métodos:
+        feed(self, text: str) -> List[str]: Consome um fragmento e retorna as partes concluídas nele.
+    """
+
+    OPEN_TAG = '<part>'
+    CLOSE_TAG = '</part>'
+
+    def __init__(self):
+        self._buffer = ''
+        self._scan_from = 0
+        self._inside_part = False
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Consome um fragmento da resposta.
+        
+        :param text: O fragmento recebido.
+        :return: Lista com o conteúdo das partes cuja tag de fechamento chegou neste fragmento.
+        """
+        self._buffer += text
+        parts = []
+        while True:
+            tag = self.CLOSE_TAG if self._inside_part else self.OPEN_TAG
+            position = self._buffer.find(tag, self._scan_from)
+            if position < 0:
+                # Guarda apenas o que pode conter o início de uma tag dividida entre fragmentos
+                if not self._inside_part:
+                    self._buffer = self._buffer[-(len(tag) - 1):]
+                    self._scan_from = 0
+                else:
+                    self._scan_from = max(len(self._buffer) - len(tag) + 1, 0)
+                return parts
+            if self._inside_part:
+                parts.append(self._buffer[:position])
+            self._buffer = self._buffer[position + len(tag):]
+            self._scan_from = 0
+            self._inside_part = not self._inside_part
 
 
 class PDFEducationalStoryGenerator:
@@ -16,28 +72,65 @@ class PDFEducationalStoryGenerator:
     5. Capturar e armazenar todas as tags <part> geradas pelo modelo.
     """
 
-    def __init__(self, pdf_filename: str):
+    def __init__(self, pdf_filename: str, text_cache: Optional[PDFTextCache] = None,
+                 char_budget: Optional[int] = None, token_budget: Optional[int] = None, sample_evenly: bool = False,
+                 top_k_chunks: Optional[int] = None, chunk_tokens: int = 256, index_path: Optional[str] = None,
+                 language_detector: Optional[SampledLanguageDetector] = None, llm_cache: Optional[LLMResponseCache] = None,
+                 prompt_token_budget: Optional[int] = None):
         """
         Inicializa a classe com o caminho do arquivo PDF.
         
         :param pdf_filename: O caminho do arquivo PDF.
+        :param text_cache: Cache opcional do texto limpo do PDF, reutilizado entre execuções.
+        :param char_budget: Orçamento opcional, em caracteres, do conteúdo enviado no prompt.
+        :param token_budget: Orçamento opcional, em tokens, do conteúdo enviado no prompt.
+        :param sample_evenly: Se True, o orçamento é preenchido com páginas espalhadas pelo documento.
+        :param top_k_chunks: Se informado, apenas os k chunks mais relevantes do documento entram no prompt.
+        :param chunk_tokens: Número alvo de tokens por chunk na seleção de chunks (padrão: 256).
+        :param index_path: Caminho opcional do arquivo .npy onde os embeddings dos chunks são mapeados em disco.
+        :param language_detector: Detector amostrado opcional; quando informado, substitui a detecção sobre o texto inteiro.
+        :param llm_cache: Cache opcional das respostas do Claude 3, reutilizado entre execuções.
+        :param prompt_token_budget: Orçamento opcional, em tokens, do conteúdo no prompt da história. O conteúdo
+            sempre é reduzido para caber na janela de contexto do modelo, descontada a resposta esperada.
         """
         self.pdf_filename = pdf_filename
-        self.pipeline = PDFTextProcessingPipeline(pdf_filename)
+        self.pipeline = PDFTextProcessingPipeline(pdf_filename, cache=text_cache)
+        self.char_budget = char_budget
+        self.token_budget = token_budget
+        self.sample_evenly = sample_evenly
+        self.top_k_chunks = top_k_chunks
+        self.chunk_tokens = chunk_tokens
+        self.index_path = index_path
+        self.language_detector = language_detector
+        self.llm_cache = llm_cache
+        self.prompt_token_budget = prompt_token_budget
+        self.claude_invoker: Optional[Claude3SonnetInvoker] = None
         self.language_map = {
             'pt': 'português',
             'en': 'inglês',
             'es': 'espanhol'
         }
     
+    def process_pdf_pages(self) -> List[str]:
+        """
+        Processa o PDF e retorna o texto limpo de cada página. Quando há um orçamento configurado,
+        apenas as páginas necessárias para preenchê-lo são lidas.
+        
+        :return: Lista com o texto limpo de cada página.
+        """
+        if self.char_budget is not None or self.token_budget is not None:
+            return self.pipeline.process_pdf_with_budget(
+                max_chars=self.char_budget, max_tokens=self.token_budget, sample_evenly=self.sample_evenly
+            )
+        return self.pipeline.process_pdf()
+
     def process_pdf(self) -> str:
         """
         Processa o PDF e retorna o texto limpo.
         
         :return: O texto limpo extraído do PDF.
         """
-        cleaned_text = self.pipeline.process_pdf()
-        return ' '.join(cleaned_text)  # Junta todas as páginas em uma única string.
+        return ' '.join(self.process_pdf_pages())  # Junta todas as páginas em uma única string.
     
     def detect_language(self, text: str) -> str:
         """
@@ -50,7 +143,8 @@ class PDFEducationalStoryGenerator:
             raise ValueError("O texto está vazio. Não é possível detectar o idioma.")
 
         try:
-            detected_language_code = detect(text)
+            with LANGDETECT_LOCK:
+                detected_language_code = detect(text)
             if detected_language_code in self.language_map:
                 return self.language_map[detected_language_code]
             else:
@@ -58,16 +152,61 @@ class PDFEducationalStoryGenerator:
         except LangDetectException:
             raise ValueError("Não foi possível detectar o idioma do texto. O conteúdo pode estar vazio ou insuficiente.")
 
+    def select_relevant_chunks(self, text: str, query: Optional[str] = None) -> str:
+        """
+        Divide o texto em chunks, gera os embeddings localmente e mantém apenas os top_k_chunks
+        mais relevantes, na ordem em que aparecem no documento.
+        
+        :param text: O texto limpo do documento.
+        :param query: Consulta opcional; sem ela, os chunks mais próximos do conteúdo médio do documento são escolhidos.
+        :return: O texto formado pelos chunks selecionados.
+        """
+        chunks = SentenceChunker(target_tokens=self.chunk_tokens).chunk_text(text)
+        if len(chunks) <= self.top_k_chunks:
+            return text
+
+        index = ChunkVectorIndex(path=self.index_path)
+        index.build(chunks)
+        matches = index.search(query if query is not None else index.centroid(), k=self.top_k_chunks)
+        selected = sorted(position for position, _ in matches)
+        return ' '.join(chunks[position].text for position in selected)
+
+    def detect_language_sampled(self, pages: List[str]) -> str:
+        """
+        Detecta o idioma por votação entre janelas amostradas das páginas, com resultado
+        determinístico e mantido em cache pelo hash do arquivo PDF.
+        
+        :param pages: O texto limpo de cada página.
+        :return: O idioma detectado como 'português', 'inglês' ou 'espanhol'.
+        """
+        if not any(page.strip() for page in pages):
+            raise ValueError("O texto está vazio. Não é possível detectar o idioma.")
+
+        detected_language_code = self.language_detector.detect(pages, document_hash=file_sha256(self.pdf_filename))
+        if detected_language_code in self.language_map:
+            return self.language_map[detected_language_code]
+        raise ValueError(f"Idioma detectado não suportado: {detected_language_code}")
+
     def generate_prompt(self, text: str, language: str) -> str:
         """
-        Formata o prompt educacional com base no idioma detectado.
+        Formata o prompt educacional com base no idioma detectado. Antes da chamada, o conteúdo é reduzido
+        (ou amostrado, com sample_evenly) para caber no orçamento de tokens e na janela de contexto do modelo,
+        com estimativas conservadoras e uma margem de segurança (CONTEXT_SAFETY_FRACTION) sobre a janela.
         
         :param text: O conteúdo educacional a ser formatado.
         :param language: O idioma detectado.
         :return: O prompt formatado para a história educacional.
         """
         prompt_formatter = EducationalStoryPromptFormatter(language)
-        return prompt_formatter.format_prompt(text)
+        content_budget = (int(CLAUDE3_CONTEXT_TOKENS * CONTEXT_SAFETY_FRACTION) - EducationalStoryPromptFormatter.EXPECTED_OUTPUT_TOKENS
+                          - estimate_prompt_tokens(prompt_formatter.format_prompt(''), BUDGET_CHARS_PER_TOKEN))
+        if self.prompt_token_budget is not None:
+            content_budget = min(content_budget, self.prompt_token_budget)
+
+        educational_content = fit_to_token_budget(text, content_budget, sample_evenly=self.sample_evenly)
+        if len(educational_content) < len(text):
+            print(f"Conteúdo reduzido de ~{estimate_tokens(text)} para ~{estimate_tokens(educational_content)} tokens para caber no orçamento.")
+        return prompt_formatter.format_prompt(educational_content)
     
     def generate_story(self, prompt: str) -> str:
         """
@@ -76,8 +215,30 @@ class PDFEducationalStoryGenerator:
         :param prompt: O prompt formatado.
         :return: A resposta gerada pelo modelo Claude 3.
         """
-        claude_invoker = Claude3SonnetInvoker()
-        return claude_invoker.invoke_claude(prompt)
+        return self._get_claude_invoker().invoke_claude(
+            prompt, max_tokens=EducationalStoryPromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="story"
+        )
+
+    async def generate_story_async(self, prompt: str) -> str:
+        """
+        Versão assíncrona de generate_story.
+        
+        :param prompt: O prompt formatado.
+        :return: A resposta gerada pelo modelo Claude 3.
+        """
+        return await self._get_claude_invoker().ainvoke_claude(
+            prompt, max_tokens=EducationalStoryPromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="story"
+        )
+
+    def _get_claude_invoker(self) -> Claude3SonnetInvoker:
+        """
+        Retorna o invocador do Claude 3 da instância, criando-o na primeira chamada.
+        
+        :return: O invocador do Claude 3.
+        """
+        if self.claude_invoker is None:
+            self.claude_invoker = Claude3SonnetInvoker(cache=self.llm_cache)
+        return self.claude_invoker
 
     def extract_parts(self, story: str) -> list:
         """
@@ -89,26 +250,117 @@ class PDFEducationalStoryGenerator:
         parts = re.findall(r'<part>(.*?)</part>', story, re.DOTALL)
         return parts
     
-    def run_pipeline(self) -> list:
+    def summarize_chunks(self, chunks: List[str], language: str, max_workers: int = 4) -> List[str]:
         """
-        Executa todo o pipeline de extração de texto, detecção de idioma, formatação de prompt e geração da história.
-        Retorna a lista de partes da história com o conteúdo gerado.
+        Resume os trechos do documento em paralelo (etapa de map), com no máximo max_workers chamadas simultâneas.
+        
+        :param chunks: Os trechos do documento.
+        :param language: O idioma detectado.
+        :param max_workers: Número máximo de chamadas simultâneas ao Claude 3 (padrão: 4).
+        :return: Lista com o resumo de cada trecho, na mesma ordem dos trechos.
         """
-        results = []
+        prompt_formatter = ChunkSummaryPromptFormatter(language)
+        claude_invoker = self._get_claude_invoker()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda chunk: self._summarize_chunk(chunk, prompt_formatter, claude_invoker), chunks))
+
+    async def summarize_chunks_async(self, chunks: List[str], language: str) -> List[str]:
+        """
+        Versão assíncrona de summarize_chunks; a concorrência é limitada pelo limite do provedor "bedrock-claude".
+        
+        :param chunks: Os trechos do documento.
+        :param language: O idioma detectado.
+        :return: Lista com o resumo de cada trecho, na mesma ordem dos trechos.
+        """
+        prompt_formatter = ChunkSummaryPromptFormatter(language)
+        claude_invoker = self._get_claude_invoker()
+        responses = await asyncio.gather(
+            *(claude_invoker.ainvoke_claude(prompt_formatter.format_prompt(chunk),
+                                            max_tokens=ChunkSummaryPromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="chunk_summary")
+              for chunk in chunks)
+        )
+        return [self._extract_summary(response) for response in responses]
+
+    def _summarize_chunk(self, chunk: str, prompt_formatter: ChunkSummaryPromptFormatter,
+                         claude_invoker: Claude3SonnetInvoker) -> str:
+        """
+        Resume um trecho do documento e extrai o conteúdo da tag <summary>.
+        
+        :param chunk: O trecho do documento.
+        :param prompt_formatter: O formatador do prompt de resumo.
+        :param claude_invoker: O invocador do Claude 3 compartilhado entre as threads.
+        :return: O resumo do trecho (ou a resposta inteira, caso a tag não seja encontrada).
+        """
+        response = claude_invoker.invoke_claude(
+            prompt_formatter.format_prompt(chunk), max_tokens=ChunkSummaryPromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="chunk_summary"
+        )
+        return self._extract_summary(response)
+
+    def _extract_summary(self, response: str) -> str:
+        """
+        Extrai o conteúdo da tag <summary> da resposta do modelo.
+        
+        :param response: A resposta do modelo.
+        :return: O resumo (ou a resposta inteira, caso a tag não seja encontrada).
+        """
+        match = re.search(r'<summary>(.*?)</summary>', response, re.DOTALL)
+        return match.group(1).strip() if match else response.strip()
 
+    def _load_text_and_language(self) -> Optional[Tuple[str, str]]:
+        """
+        Executa as etapas de extração do texto e detecção de idioma.
+        
+        :return: Tupla (texto limpo, idioma) ou None caso o idioma não possa ser detectado.
+        """
         # Etapa 1: Processar o PDF e extrair o texto limpo
         print("Extraindo e limpando o texto do PDF...")
-        extracted_text = self.process_pdf()
+        pages = self.process_pdf_pages()
+        extracted_text = ' '.join(pages)
         print("Texto extraído com sucesso.")
 
         # Etapa 2: Detectar o idioma do texto
         print("Detectando o idioma do texto...")
         try:
-            language = self.detect_language(extracted_text)
+            if self.language_detector is not None:
+                language = self.detect_language_sampled(pages)
+            else:
+                language = self.detect_language(extracted_text)
             print(f"Idioma detectado: {language}.")
         except ValueError as e:
             print(f"Erro: {e}")
-            return results  # Retorna uma lista vazia caso haja erro
+            return None
+        return extracted_text, language
+
+    def _format_results(self, parts: List[str]) -> List[Dict[str, str]]:
+        """
+        Formata o resultado para cada parte da história.
+        
+        :param parts: As partes extraídas da história.
+        :return: Lista de dicionários com a parte da história e o marcador do prompt de imagem.
+        """
+        results = []
+        for i, part in enumerate(parts, 1):
+            result = {
+                'story_part': part,
+                'prompt_img': f"Prompt para a parte {i} gerado pelo Claude 3."
+            }
+            results.append(result)
+        return results
+
+    def run_pipeline(self) -> list:
+        """
+        Executa todo o pipeline de extração de texto, detecção de idioma, formatação de prompt e geração da história.
+        Retorna a lista de partes da história com o conteúdo gerado.
+        """
+        loaded = self._load_text_and_language()
+        if loaded is None:
+            return []  # Retorna uma lista vazia caso haja erro
+        extracted_text, language = loaded
+
+        # Etapa opcional: Manter apenas os chunks mais relevantes do documento
+        if self.top_k_chunks:
+            print(f"Selecionando os {self.top_k_chunks} chunks mais relevantes...")
+            extracted_text = self.select_relevant_chunks(extracted_text)
 
         # Etapa 3: Gerar o prompt com base no idioma detectado
         print("Gerando o prompt educacional...")
@@ -125,15 +377,109 @@ class PDFEducationalStoryGenerator:
         parts = self.extract_parts(story)
         print(f"Total de {len(parts)} partes extraídas.")
 
-        # Formatar o resultado para cada parte
-        for i, part in enumerate(parts, 1):
-            result = {
-                'story_part': part,
-                'prompt_img': f"Prompt para a parte {i} gerado pelo Claude 3."
-            }
-            results.append(result)
+        return self._format_results(parts)
 
-        return results
+    def run_pipeline_streaming(self) -> Iterator[Dict[str, str]]:
+        """
+        Executa o pipeline usando a resposta em streaming do Claude 3 e produz cada parte da história
+        assim que sua tag </part> é recebida, permitindo iniciar as etapas seguintes (prompt de imagem,
+        imagem e áudio) da primeira parte enquanto as demais ainda estão sendo geradas.
+        
+        :return: Iterador de dicionários no mesmo formato de run_pipeline, na ordem das partes.
+        """
+        loaded = self._load_text_and_language()
+        if loaded is None:
+            return  # Nenhuma parte é produzida caso haja erro
+        extracted_text, language = loaded
+
+        if self.top_k_chunks:
+            extracted_text = self.select_relevant_chunks(extracted_text)
+
+        print("Gerando a história educacional com Claude 3 (streaming)...")
+        parser = IncrementalPartParser()
+        part_number = 0
+        fragments = self._get_claude_invoker().invoke_claude_stream(
+            self.generate_prompt(extracted_text, language), max_tokens=EducationalStoryPromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="story"
+        )
+        for fragment in fragments:
+            for part in parser.feed(fragment):
+                part_number += 1
+                print(f"Parte {part_number} recebida.")
+                yield {
+                    'story_part': part,
+                    'prompt_img': f"Prompt para a parte {part_number} gerado pelo Claude 3."
+                }
+
+    def run_map_reduce_pipeline(self, max_workers: int = 4, chunk_tokens: int = 3000) -> list:
+        """
+        Executa o pipeline no modo map-reduce, indicado para documentos longos: o texto é dividido em trechos,
+        os trechos são resumidos em paralelo e uma chamada final gera as 6 partes da história a partir dos resumos.
+        O tempo total passa a depender do número de workers, e não do tamanho do documento.
+        
+        :param max_workers: Número máximo de resumos simultâneos (padrão: 4).
+        :param chunk_tokens: Número alvo de tokens de cada trecho resumido (padrão: 3000).
+        :return: A lista de partes da história com o conteúdo gerado.
+        """
+        loaded = self._load_text_and_language()
+        if loaded is None:
+            return []  # Retorna uma lista vazia caso haja erro
+        extracted_text, language = loaded
+
+        # Etapa 3 (map): Resumir os trechos do documento em paralelo
+        chunks = [chunk.text for chunk in SentenceChunker(target_tokens=chunk_tokens).chunk_text(extracted_text)]
+        if len(chunks) > 1:
+            print(f"Resumindo {len(chunks)} trechos com até {max_workers} chamadas simultâneas...")
+            educational_content = '\n\n'.join(self.summarize_chunks(chunks, language, max_workers=max_workers))
+            print("Trechos resumidos com sucesso.")
+        else:
+            educational_content = extracted_text
+
+        # Etapa 4 (reduce): Gerar a história a partir dos resumos
+        print("Gerando a história educacional com Claude 3...")
+        story = self.generate_story(self.generate_prompt(educational_content, language))
+        print("História gerada com sucesso.")
+
+        parts = self.extract_parts(story)
+        print(f"Total de {len(parts)} partes extraídas.")
+
+        return self._format_results(parts)
+
+    async def run_pipeline_async(self) -> list:
+        """
+        Versão assíncrona de run_pipeline: as etapas de CPU rodam em uma thread e a chamada ao Claude 3
+        é aguardada sem bloquear o event loop, permitindo atender várias histórias no mesmo processo.
+        
+        :return: A lista de partes da história com o conteúdo gerado.
+        """
+        loaded = await asyncio.to_thread(self._load_text_and_language)
+        if loaded is None:
+            return []  # Retorna uma lista vazia caso haja erro
+        extracted_text, language = loaded
+
+        if self.top_k_chunks:
+            extracted_text = await asyncio.to_thread(self.select_relevant_chunks, extracted_text)
+
+        story = await self.generate_story_async(self.generate_prompt(extracted_text, language))
+        return self._format_results(self.extract_parts(story))
 
+    async def run_map_reduce_pipeline_async(self, chunk_tokens: int = 3000) -> list:
+        """
+        Versão assíncrona de run_map_reduce_pipeline; os resumos são aguardados em conjunto e a
+        concorrência é limitada pelo limite do provedor "bedrock-claude".
+        
+        :param chunk_tokens: Número alvo de tokens de cada trecho resumido (padrão: 3000).
+        :return: A lista de partes da história com o conteúdo gerado.
+        """
+        loaded = await asyncio.to_thread(self._load_text_and_language)
+        if loaded is None:
+            return []  # Retorna uma lista vazia caso haja erro
+        extracted_text, language = loaded
 
+        chunks = [chunk.text for chunk in SentenceChunker(target_tokens=chunk_tokens).chunk_text(extracted_text)]
+        if len(chunks) > 1:
+            educational_content = '\n\n'.join(await self.summarize_chunks_async(chunks, language))
+        else:
+            educational_content = extracted_text
 
+        story = await self.generate_story_async(self.generate_prompt(educational_content, language))
+        return self._format_results(self.extract_parts(story))
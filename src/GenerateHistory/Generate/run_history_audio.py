@@ -1,2 +1,59 @@
+import asyncio
+from typing import List, Dict
 from src.general.ModelVoiceGenerator.model_voice_generator import VoiceGenerator
 
+
+class StoryAudioPipeline:
+    """
+    Classe responsável por gerar o áudio de cada parte da história e adicioná-lo à estrutura em base64.
+    
+    Métodos:
+        __init__(self, stories: List[Dict[str, str]], voice_generator: VoiceGenerator): Inicializa a classe com as histórias e o gerador de voz.
+        process_audio(self) -> List[Dict[str, str]]: Gera o áudio de cada história, com concorrência limitada pela chave de API.
+        process_audio_async(self) -> List[Dict[str, str]]: Versão assíncrona, que gera os áudios concorrentemente.
+    """
+
+    def __init__(self, stories: List[Dict[str, str]], voice_generator: VoiceGenerator, voice_name: str = "Brian"):
+        """
+        Inicializa a classe com a lista de histórias e o gerador de voz.
+        
+        :param stories: Lista contendo as histórias e imagens.
+        :param voice_generator: O gerador de voz da ElevenLabs.
+        :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
+        """
+        self.stories = stories
+        self.voice_generator = voice_generator
+        self.voice_name = voice_name
+
+    def process_audio(self) -> List[Dict[str, str]]:
+        """
+        Gera o áudio de cada história, com concorrência limitada pela chave de API e preservando a ordem.
+        
+        :return: Lista atualizada com o campo "audio" adicionado (None, com "audio_error", nas histórias que falharem).
+        """
+        return self.voice_generator.process_story_structure(self.stories, voice_name=self.voice_name)
+
+    async def _process_story_async(self, story_data: Dict[str, str]) -> Dict[str, str]:
+        """
+        Gera o áudio de uma história de forma assíncrona.
+        
+        :param story_data: A história.
+        :return: A história com o campo "audio" em base64 (None, com "audio_error", em caso de erro).
+        """
+        try:
+            generated_audio = await self.voice_generator.agenerate_audio(text=story_data.get("story", ""), voice_name=self.voice_name)
+            story_data["audio"] = self.voice_generator.save_audio_as_base64(generated_audio)
+        except Exception as e:
+            print(f"Erro ao gerar o áudio para a história: {e}")
+            story_data["audio"] = None
+            story_data["audio_error"] = str(e)
+        return story_data
+
+    async def process_audio_async(self) -> List[Dict[str, str]]:
+        """
+        Versão assíncrona de process_audio: os áudios são gerados concorrentemente, limitados pelo
+        limite do provedor "elevenlabs", e a ordem das histórias é preservada.
+        
+        :return: Lista atualizada com o campo "audio" adicionado.
+        """
+        return list(await asyncio.gather(*(self._process_story_async(story_data) for story_data in self.stories)))
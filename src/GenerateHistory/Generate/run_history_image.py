@@ -1,28 +1,34 @@
+import asyncio
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
 from src.GenerateHistory.Prompts.generate_prompt_image import ImagePromptFormatter
 from src.general.ModelTextGenerator.model_text_generator import Claude3SonnetInvoker
+from src.general.Cache.llm_cache import LLMResponseCache
 
 class StoryToImagePromptPipeline:
     """
     Classe responsável por processar cada parte da história gerada e passar para o prompt de imagem e Claude 3.
     
     Métodos:
-        __init__(self, story_parts: List[str], language: str): Inicializa a classe com a lista de partes da história e o idioma.
+        __init__(self, story_parts: List[str], language: str, llm_cache: Optional[LLMResponseCache]): Inicializa a classe com a lista de partes da história e o idioma.
+        process_story_part(self, part: Dict[str, str]) -> Optional[Dict[str, str]]: Gera o prompt de imagem de uma única parte.
         process_story_parts(self) -> List[Dict[str, str]]: Processa cada parte da história, gera o prompt e armazena a resposta.
+        process_story_parts_batched(self) -> List[Dict[str, str]]: Gera os prompts de todas as partes em uma única chamada.
+        process_story_parts_async(self) -> List[Dict[str, str]]: Versão assíncrona, que processa as partes concorrentemente.
     """
     
-    def __init__(self, story_parts: List[Dict[str, str]], language: str):
+    def __init__(self, story_parts: List[Dict[str, str]], language: str, llm_cache: Optional[LLMResponseCache] = None):
         """
         Inicializa a classe com a lista de partes da história e o idioma escolhido para o prompt de imagem.
         
         :param story_parts: Lista contendo as partes da história gerada.
         :param language: O idioma em que os prompts de imagem serão gerados (português, inglês ou espanhol).
+        :param llm_cache: Cache opcional das respostas do Claude 3, reutilizado entre execuções.
         """
         self.story_parts = story_parts
         self.language = language
         self.prompt_formatter = ImagePromptFormatter(language)
-        self.claude_invoker = Claude3SonnetInvoker()
+        self.claude_invoker = Claude3SonnetInvoker(cache=llm_cache)
     
     def _extract_image_prompt(self, generated_text: str) -> str:
         """
@@ -36,6 +42,96 @@ class StoryToImagePromptPipeline:
             return match.group(1).strip()
         return "Prompt não encontrado."
 
+    def _extract_indexed_image_prompts(self, generated_text: str) -> Dict[int, str]:
+        """
+        Extrai os prompts das tags <image_prompt id="n"> do texto gerado.
+        
+        :param generated_text: O texto gerado pelo modelo Claude 3 com os prompts indexados.
+        :return: Dicionário {id: prompt de imagem}, sem prompts vazios.
+        """
+        matches = re.findall(r'<image_prompt\s+id\s*=\s*["\']?(\d+)["\']?\s*>(.*?)</image_prompt>', generated_text, re.DOTALL)
+        return {int(index): prompt.strip() for index, prompt in matches if prompt.strip()}
+
+    def process_story_parts_batched(self) -> List[Dict[str, str]]:
+        """
+        Gera os prompts de imagem de todas as partes em uma única chamada ao Claude 3, pedindo saídas
+        indexadas. As partes cujo prompt não vier na resposta, ou todas elas se a chamada em lote falhar
+        (erro do Bedrock ou resposta ilegível), são processadas individualmente, e uma falha nesse caso
+        perde apenas a parte correspondente.
+        
+        :return: Lista de dicionários com a história e o prompt de imagem gerado para cada parte.
+        """
+        if not self.story_parts:
+            return []
+
+        image_prompts = {}
+        try:
+            formatted_prompt = self.prompt_formatter.format_batch_prompt([part['story_part'] for part in self.story_parts])
+            generated_text = self.claude_invoker.invoke_claude(
+                formatted_prompt, max_tokens=ImagePromptFormatter.EXPECTED_OUTPUT_TOKENS * len(self.story_parts), stage="image_prompt"
+            )
+            image_prompts = self._extract_indexed_image_prompts(generated_text)
+        except Exception as e:
+            print(f"Erro ao processar as partes da história em lote: {e}")
+
+        results = []
+        for index, part in enumerate(self.story_parts, 1):
+            if index in image_prompts:
+                result = {
+                    'story': part['story_part'],
+                    'prompt_img': image_prompts[index]
+                }
+            else:
+                print(f"Prompt da parte {index} ausente na resposta em lote. Gerando individualmente...")
+                result = self._process_story_part_fallback(index, part)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def _process_story_part_fallback(self, index: int, part: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Gera individualmente o prompt de uma parte que ficou de fora da resposta em lote, isolando
+        qualquer erro para que ele não interrompa as demais partes.
+        
+        :param index: O índice da parte (começando em 1).
+        :param part: A parte da história (com a chave 'story_part').
+        :return: Dicionário com a história e o prompt de imagem, ou None em caso de erro.
+        """
+        try:
+            return self.process_story_part(part)
+        except Exception as e:
+            print(f"Erro ao processar a parte {index} da história: {e}")
+            return None
+
+    def process_story_part(self, part: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Gera o prompt de imagem de uma única parte da história.
+        
+        :param part: A parte da história (com a chave 'story_part').
+        :return: Dicionário com a história e o prompt de imagem, ou None em caso de erro.
+        """
+        try:
+            # Gera o prompt de imagem para a parte da história
+            formatted_prompt = self.prompt_formatter.format_prompt(part['story_part'])
+            
+            # Envia o prompt para o modelo Claude 3
+            generated_prompt = self.claude_invoker.invoke_claude(
+                formatted_prompt, max_tokens=ImagePromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="image_prompt"
+            )
+            
+            # Extrai o prompt da imagem gerado entre as tags <image_prompt>
+            image_prompt = self._extract_image_prompt(generated_prompt)
+            
+            # Armazena a parte da história e o prompt gerado em uma estrutura de dados
+            return {
+                'story': part['story_part'],
+                'prompt_img': image_prompt
+            }
+            
+        except ValueError as e:
+            print(f"Erro ao processar a parte da história: {e}")
+            return None
+
     def process_story_parts(self) -> List[Dict[str, str]]:
         """
         Processa cada parte da história, gera o prompt de imagem e passa o prompt para o Claude 3.
@@ -46,26 +142,38 @@ class StoryToImagePromptPipeline:
         results = []
         
         for part in self.story_parts:
-            try:
-                # Gera o prompt de imagem para a parte da história
-                formatted_prompt = self.prompt_formatter.format_prompt(part['story_part'])
-                
-                # Envia o prompt para o modelo Claude 3
-                generated_prompt = self.claude_invoker.invoke_claude(formatted_prompt)
-                
-                # Extrai o prompt da imagem gerado entre as tags <image_prompt>
-                image_prompt = self._extract_image_prompt(generated_prompt)
-                
-                # Armazena a parte da história e o prompt gerado em uma estrutura de dados
-                result = {
-                    'story': part['story_part'],
-                    'prompt_img': image_prompt
-                }
+            result = self.process_story_part(part)
+            if result is not None:
                 results.append(result)
-                
-            except ValueError as e:
-                print(f"Erro ao processar a parte da história: {e}")
         
         return results
 
+    async def _process_story_part_async(self, part: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Gera o prompt de imagem de uma parte da história de forma assíncrona.
+        
+        :param part: A parte da história.
+        :return: Dicionário com a história e o prompt de imagem, ou None em caso de erro.
+        """
+        try:
+            formatted_prompt = self.prompt_formatter.format_prompt(part['story_part'])
+            generated_prompt = await self.claude_invoker.ainvoke_claude(
+                formatted_prompt, max_tokens=ImagePromptFormatter.EXPECTED_OUTPUT_TOKENS, stage="image_prompt"
+            )
+            return {
+                'story': part['story_part'],
+                'prompt_img': self._extract_image_prompt(generated_prompt)
+            }
+        except ValueError as e:
+            print(f"Erro ao processar a parte da história: {e}")
+            return None
 
+    async def process_story_parts_async(self) -> List[Dict[str, str]]:
+        """
+        Versão assíncrona de process_story_parts: as partes são processadas concorrentemente,
+        limitadas pelo limite do provedor "bedrock-claude", e a ordem das partes é preservada.
+        
+        :return: Lista de dicionários com a história e o prompt de imagem gerado para cada parte.
+        """
+        results = await asyncio.gather(*(self._process_story_part_async(part) for part in self.story_parts))
+        return [result for result in results if result is not None]
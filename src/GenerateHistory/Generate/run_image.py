@@ -1,24 +1,51 @@
-from typing import List, Dict
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional
 from src.general.ModelImageGenerator.model_image_generator import StableDiffusionImageGenerator
+from src.general.BlobStore.blob_store import BlobStore
+from src.general.Cache.image_cache import ImageCache
+from src.general.Embedding.prompt_index import SimilarPromptIndex
 
 class StoryImagePipeline:
     """
     Classe responsável por processar cada parte da história gerada e gerar uma imagem baseada no prompt_img.
     
     Métodos:
-        __init__(self, stories_with_prompts: List[Dict[str, str]]): Inicializa a classe com a estrutura contendo a história e o prompt da imagem.
-        process_images(self) -> List[Dict[str, str]]: Processa cada prompt de imagem e gera a imagem correspondente em base64, atualizando a estrutura.
+        __init__(self, stories_with_prompts: List[Dict[str, str]], region_name: str, max_in_flight: int, blob_store: Optional[BlobStore], image_cache: Optional[ImageCache], prompt_index: Optional[SimilarPromptIndex]): Inicializa a classe com a estrutura contendo a história e o prompt da imagem.
+        process_image(self, story: Dict[str, str], index: Optional[int]) -> Optional[Dict[str, str]]: Gera a imagem de uma única história.
+        process_images(self, max_in_flight: Optional[int]) -> List[Dict[str, str]]: Gera as imagens em base64, com até max_in_flight gerações simultâneas, atualizando a estrutura.
+        process_images_async(self) -> List[Dict[str, str]]: Versão assíncrona, que gera as imagens concorrentemente.
     """
 
-    def __init__(self, stories_with_prompts: List[Dict[str, str]], region_name: str = "us-east-1"):
+    def __init__(self, stories_with_prompts: List[Dict[str, str]], region_name: str = "us-east-1", max_in_flight: int = 1,
+                 blob_store: Optional[BlobStore] = None, image_cache: Optional[ImageCache] = None,
+                 prompt_index: Optional[SimilarPromptIndex] = None):
         """
         Inicializa a classe com a lista de histórias e seus prompts de imagem.
         
         :param stories_with_prompts: Lista contendo as histórias e os prompts de imagem.
         :param region_name: A região para inicializar o gerador de imagens do Stable Diffusion.
+        :param max_in_flight: Número máximo de imagens geradas simultaneamente em process_images; deve respeitar
+            a cota do Bedrock para o Stable Diffusion (padrão: 1, geração sequencial).
+        :param blob_store: Armazenamento opcional das imagens; quando informado, o campo 'img' recebe a
+            referência {hash, size, mime} do PNG gravado em vez da string base64.
+        :param image_cache: Cache opcional das imagens; quando informado, as sementes passam a ser derivadas
+            do prompt, de forma que regenerar a mesma história reaproveita as imagens já geradas.
+        :param prompt_index: Índice opcional de prompts anteriores; quando um prompt é quase idêntico a um já
+            gerado, a imagem armazenada é reaproveitada em vez de gerada. Requer blob_store.
+        :raises ValueError: Se prompt_index for informado sem blob_store.
         """
+        if prompt_index is not None and blob_store is None:
+            raise ValueError("O reaproveitamento de imagens por similaridade requer um BlobStore.")
         self.stories_with_prompts = stories_with_prompts
-        self.image_generator = StableDiffusionImageGenerator(region_name=region_name)
+        self.image_generator = StableDiffusionImageGenerator(
+            region_name=region_name, deterministic_seed=image_cache is not None, cache=image_cache
+        )
+        self.max_in_flight = max_in_flight
+        self.blob_store = blob_store
+        self.prompt_index = prompt_index
+        self.failures: List[Dict[str, Any]] = []
     
     def _generate_image_base64(self, prompt: str) -> str:
         """
@@ -30,31 +57,164 @@ class StoryImagePipeline:
         base64_image = self.image_generator.generate_image(prompt)
         return base64_image
 
-    def process_images(self) -> List[Dict[str, str]]:
+    def _to_image_field(self, base64_image: str) -> Any:
         """
-        Processa cada prompt_img gerando a imagem em formato base64 e atualiza a estrutura.
+        Converte a imagem gerada no valor do campo 'img': a referência do blob, quando há um BlobStore,
+        ou a própria string base64.
         
-        :return: Lista atualizada de dicionários contendo a história e a imagem gerada em base64.
+        :param base64_image: A imagem em base64 retornada pelo modelo.
+        :return: A referência {hash, size, mime} ou a string base64.
+        """
+        if self.blob_store is None:
+            return base64_image
+        return self.blob_store.put_base64(base64_image, "image/png")
+
+    def _reuse_image(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca no índice de prompts uma imagem já gerada para um prompt quase idêntico. O acerto só é
+        contabilizado quando o arquivo da imagem ainda existe e ela é de fato reaproveitada.
+        
+        :param prompt: O prompt de imagem.
+        :return: A referência da imagem armazenada ou None.
+        """
+        if self.prompt_index is None:
+            return None
+        match = self.prompt_index.lookup(prompt)
+        if match is None or not os.path.exists(self.blob_store.path(match['image_ref'])):
+            return None
+        self.prompt_index.record_hit()
+        print(f"Imagem reaproveitada (similaridade {match['similarity']:.2f}) do prompt: {match['prompt']}")
+        return match['image_ref']
+
+    def _store_generated_image(self, prompt: str, base64_image: str) -> Any:
+        """
+        Converte a imagem recém-gerada no valor do campo 'img' e a indexa pelo prompt, quando há um índice.
+        
+        :param prompt: O prompt de imagem.
+        :param base64_image: A imagem em base64 retornada pelo modelo.
+        :return: A referência do blob ou a string base64 da imagem.
+        """
+        image = self._to_image_field(base64_image)
+        if self.prompt_index is not None:
+            self.prompt_index.add(prompt, image)
+        return image
+
+    def _image_for_prompt(self, prompt: str) -> Any:
+        """
+        Retorna o valor do campo 'img' para o prompt, reaproveitando uma imagem de um prompt similar
+        quando possível e indexando as imagens geradas.
+        
+        :param prompt: O prompt de imagem.
+        :return: A referência do blob ou a string base64 da imagem.
+        """
+        reused = self._reuse_image(prompt)
+        if reused is not None:
+            return reused
+        return self._store_generated_image(prompt, self._generate_image_base64(prompt))
+
+    async def _aimage_for_prompt(self, prompt: str) -> Any:
+        """
+        Versão assíncrona de _image_for_prompt.
+        
+        :param prompt: O prompt de imagem.
+        :return: A referência do blob ou a string base64 da imagem.
+        """
+        reused = self._reuse_image(prompt)
+        if reused is not None:
+            return reused
+        return self._store_generated_image(prompt, await self.image_generator.agenerate_image(prompt))
+
+    def process_image(self, story: Dict[str, str], index: Optional[int] = None) -> Optional[Dict[str, str]]:
         """
-        results = []
+        Gera a imagem de uma única história com base no seu prompt_img. Usa o mesmo caminho de process_images,
+        de forma que uma falha também é registrada em self.failures.
+        
+        :param story: A história com o prompt de imagem.
+        :param index: O índice da parte (começando em 1), usado no registro da falha (padrão: desconhecido).
+        :return: Dicionário com a história e a imagem em base64, ou None em caso de erro.
+        """
+        return self._process_indexed_image(index, story)
 
-        for story in self.stories_with_prompts:
-            try:
-                # Gera a imagem em base64 com base no prompt_img
-                base64_image = self._generate_image_base64(story['prompt_img'])
-                
-                # Atualiza a estrutura com a imagem gerada em base64
-                result = {
-                    'story': story['story'],
-                    'img': base64_image
-                }
-                results.append(result)
+    def _process_indexed_image(self, index: Optional[int], story: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Gera a imagem de uma história e, em caso de erro, registra a falha com o índice da parte.
+        
+        :param index: O índice da parte (começando em 1), ou None se desconhecido.
+        :param story: A história com o prompt de imagem.
+        :return: Dicionário com a história e a imagem em base64, ou None em caso de erro.
+        """
+        try:
+            # Gera a imagem com base no prompt_img (em base64 ou como referência do blob)
+            return {
+                'story': story['story'],
+                'img': self._image_for_prompt(story['prompt_img'])
+            }
+        except Exception as e:
+            self._record_failure(index, story, e)
+            return None
 
-            except Exception as e:
-                print(f"Erro ao gerar a imagem para o prompt: {story['prompt_img']} - Erro: {e}")
+    def _record_failure(self, index: Optional[int], story: Dict[str, str], error: Exception):
+        """
+        Registra em self.failures a falha na geração da imagem de uma história.
         
-        return results
+        :param index: O índice da parte (começando em 1), ou None se desconhecido.
+        :param story: A história com o prompt de imagem.
+        :param error: O erro ocorrido.
+        """
+        part = f" da parte {index}" if index is not None else ""
+        print(f"Erro ao gerar a imagem{part} para o prompt: {story['prompt_img']} - Erro: {error}")
+        self.failures.append({'part': index, 'prompt_img': story['prompt_img'], 'error': str(error)})
 
+    def process_images(self, max_in_flight: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Processa cada prompt_img gerando a imagem em formato base64 e atualiza a estrutura. Com max_in_flight
+        maior que 1, as imagens são geradas em paralelo em um pool de threads, preservando a ordem das histórias.
+        As partes que falharem ficam de fora do resultado e são registradas em self.failures.
+        
+        :param max_in_flight: Número máximo de gerações simultâneas (padrão: o informado na inicialização).
+        :return: Lista atualizada de dicionários contendo a história e a imagem gerada em base64.
+        """
+        max_in_flight = max_in_flight if max_in_flight is not None else self.max_in_flight
+        self.failures = []
+        indexed_stories = list(enumerate(self.stories_with_prompts, 1))
+
+        if max_in_flight > 1 and len(indexed_stories) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_in_flight, len(indexed_stories))) as executor:
+                results = list(executor.map(lambda item: self._process_indexed_image(*item), indexed_stories))
+        else:
+            results = [self._process_indexed_image(index, story) for index, story in indexed_stories]
 
+        self.failures.sort(key=lambda failure: failure['part'])
+        return [result for result in results if result is not None]
 
+    async def _process_image_async(self, index: int, story: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Gera a imagem de uma história de forma assíncrona, registrando a falha com o índice da parte.
+        
+        :param index: O índice da parte (começando em 1).
+        :param story: A história com o prompt de imagem.
+        :return: Dicionário com a história e a imagem em base64, ou None em caso de erro.
+        """
+        try:
+            return {
+                'story': story['story'],
+                'img': await self._aimage_for_prompt(story['prompt_img'])
+            }
+        except Exception as e:
+            self._record_failure(index, story, e)
+            return None
 
+    async def process_images_async(self) -> List[Dict[str, str]]:
+        """
+        Versão assíncrona de process_images: as imagens são geradas concorrentemente, limitadas pelo
+        limite do provedor "bedrock-stable-diffusion", e a ordem das histórias é preservada.
+        As partes que falharem são registradas em self.failures.
+        
+        :return: Lista atualizada de dicionários contendo a história e a imagem gerada em base64.
+        """
+        self.failures = []
+        results = await asyncio.gather(
+            *(self._process_image_async(index, story) for index, story in enumerate(self.stories_with_prompts, 1))
+        )
+        self.failures.sort(key=lambda failure: failure['part'])
+        return [result for result in results if result is not None]
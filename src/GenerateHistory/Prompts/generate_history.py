@@ -9,6 +9,9 @@ class EducationalStoryPromptFormatter:
         __init__(self, language: str): Inicializa a classe com o idioma escolhido.
         format_prompt(self, educational_content: str) -> str: Formata o prompt com base no idioma selecionado.
     """
+
+    # Tamanho esperado da resposta (6 partes de até 2 parágrafos curtos), usado como max_tokens da chamada
+    EXPECTED_OUTPUT_TOKENS = 2048
     
     def __init__(self, language: str):
         """
@@ -158,3 +161,92 @@ class EducationalStoryPromptFormatter:
             raise ValueError(f"Idioma não suportado: {self.language}. Escolha entre português, inglês ou espanhol.")
 
 
+class ChunkSummaryPromptFormatter:
+    """
+    Classe responsável por formatar o prompt de resumo de um trecho do conteúdo educacional,
+    usado na etapa de map do modo map-reduce, em três línguas: Espanhol, Português e Inglês.
+    
+    Métodos:
+        __init__(self, language: str): Inicializa a classe com o idioma escolhido.
+        format_prompt(self, content_chunk: str) -> str: Formata o prompt com base no idioma selecionado.
+    """
+
+    # Tamanho esperado da resposta (resumo de até 2 parágrafos), usado como max_tokens da chamada
+    EXPECTED_OUTPUT_TOKENS = 512
+    
+    def __init__(self, language: str):
+        """
+        Inicializa o formatador de prompt com o idioma escolhido.
+        
+        :param language: O idioma desejado (português, inglês ou espanhol).
+        """
+        self.language = language.lower()
+        self.prompts = {
+            "português": self._format_prompt_portuguese,
+            "inglês": self._format_prompt_english,
+            "espanhol": self._format_prompt_spanish
+        }
+    
+    def _format_prompt_portuguese(self, content_chunk: str) -> str:
+        """
+        Formata o prompt em português.
+
+        :param content_chunk: O trecho do conteúdo educacional que será resumido.
+        :return: Uma string formatada com o prompt em português.
+        """
+        return f"""
+        Você receberá um trecho de um conteúdo educacional. Resuma os principais conceitos, fatos, datas e exemplos do trecho de forma fiel e objetiva, em no máximo 2 parágrafos.
+
+        <content_chunk>
+        {content_chunk}
+        </content_chunk>
+
+        Não invente informações que não estejam no trecho. Escreva o resumo dentro das tags <summary>.
+        """
+    
+    def _format_prompt_english(self, content_chunk: str) -> str:
+        """
+        Formata o prompt em inglês.
+
+        :param content_chunk: O trecho do conteúdo educacional que será resumido.
+        :return: Uma string formatada com o prompt em inglês.
+        """
+        return f"""
+        You will receive an excerpt of educational content. Summarize the key concepts, facts, dates and examples of the excerpt faithfully and objectively, in at most 2 paragraphs.
+
+        <content_chunk>
+        {content_chunk}
+        </content_chunk>
+
+        Do not invent information that is not in the excerpt. Write the summary inside the <summary> tags.
+        """
+    
+    def _format_prompt_spanish(self, content_chunk: str) -> str:
+        """
+        Formata o prompt em espanhol.
+
+        :param content_chunk: O trecho do conteúdo educacional que será resumido.
+        :return: Uma string formatada com o prompt em espanhol.
+        """
+        return f"""
+        Recibirás un fragmento de un contenido educativo. Resume los conceptos, hechos, fechas y ejemplos clave del fragmento de forma fiel y objetiva, en un máximo de 2 párrafos.
+
+        <content_chunk>
+        {content_chunk}
+        </content_chunk>
+
+        No inventes información que no esté en el fragmento. Escribe el resumen dentro de las etiquetas <summary>.
+        """
+    
+    def format_prompt(self, content_chunk: str) -> str:
+        """
+        Formata o prompt com base no idioma selecionado.
+
+        :param content_chunk: O trecho do conteúdo educacional que será resumido.
+        :return: A string formatada com o prompt no idioma selecionado.
+        :raises ValueError: Se o idioma não for suportado.
+        """
+        if self.language in self.prompts:
+            return self.prompts[self.language](content_chunk)
+        else:
+            raise ValueError(f"Idioma não suportado: {self.language}. Escolha entre português, inglês ou espanhol.")
@@ -8,8 +8,12 @@ class ImagePromptFormatter:
     Métodos:
         __init__(self, language: str): Inicializa a classe com o idioma escolhido.
         format_prompt(self, story_segment: str) -> str: Formata o prompt com base no idioma selecionado.
+        format_batch_prompt(self, story_segments: List[str]) -> str: Formata um único prompt para todos os segmentos, com saídas indexadas.
     """
 
+    # Tamanho esperado de cada prompt de imagem (2-3 frases), usado como max_tokens da chamada
+    EXPECTED_OUTPUT_TOKENS = 256
+
     def __init__(self, language: str):
         """
         Inicializa o formatador de prompt com o idioma escolhido.
@@ -22,6 +26,11 @@ class ImagePromptFormatter:
             "inglês": self._format_prompt_english,
             "espanhol": self._format_prompt_spanish
         }
+        self.batch_prompts = {
+            "português": self._format_batch_prompt_portuguese,
+            "inglês": self._format_batch_prompt_english,
+            "espanhol": self._format_batch_prompt_spanish
+        }
 
     def _format_prompt_portuguese(self, story_segment: str) -> str:
         """
@@ -121,3 +130,100 @@ class ImagePromptFormatter:
             return self.prompts[self.language](story_segment)
         else:
             raise ValueError(f"Idioma não suportado: {self.language}. Escolha entre português, inglês ou espanhol.")
+
+    def _format_segments(self, story_segments: List[str]) -> str:
+        """
+        Formata os segmentos da história com seus índices (começando em 1).
+
+        :param story_segments: Os segmentos de história.
+        :return: Os segmentos envolvidos em tags <story_segment id="n">.
+        """
+        return "\n".join(
+            f'<story_segment id="{index}">\n{segment}\n</story_segment>'
+            for index, segment in enumerate(story_segments, 1)
+        )
+
+    def _format_batch_prompt_portuguese(self, story_segments: List[str]) -> str:
+        """
+        Formata o prompt em lote em português.
+
+        :param story_segments: Os segmentos de história que serão inseridos no prompt.
+        :return: Uma string formatada com o prompt em português.
+        """
+        return f"""
+        Você tem a tarefa de criar um prompt de imagem claro, específico e conciso para cada um dos {len(story_segments)} fragmentos de uma história abaixo. Seu objetivo é capturar os principais elementos visuais de cada fragmento e traduzi-los em um prompt que pode ser usado para gerar uma imagem.
+
+        {self._format_segments(story_segments)}
+
+        Diretrizes para criar cada prompt de imagem:
+        1. Concentre-se nos elementos visualmente mais marcantes ou importantes do fragmento da história
+        2. Seja específico sobre cores, texturas, iluminação e composição quando relevante
+        3. Mantenha o prompt conciso, idealmente não mais do que 2-3 frases
+        4. Use uma linguagem simples e direta.
+        5. Evite conceitos abstratos ou metáforas.
+        6. Inclua detalhes sensoriais que uma criança autista pode achar envolventes.
+        7. Use adjetivos descritivos para melhorar a qualidade visual
+
+        Escreva o prompt de cada fragmento dentro de tags <image_prompt id="n">, usando o mesmo id do fragmento correspondente. Crie exatamente um prompt para cada fragmento.
+        """
+
+    def _format_batch_prompt_english(self, story_segments: List[str]) -> str:
+        """
+        Formata o prompt em lote em inglês.
+
+        :param story_segments: Os segmentos de história que serão inseridos no prompt.
+        :return: Uma string formatada com o prompt em inglês.
+        """
+        return f"""
+        You are tasked with creating a clear, specific, and concise image prompt for each of the {len(story_segments)} story fragments below. Your goal is to capture the key visual elements of each fragment and translate them into a prompt that can be used to generate an image.
+
+        {self._format_segments(story_segments)}
+
+        Guidelines for creating each image prompt:
+        1. Focus on the most visually striking or important elements of the story fragment
+        2. Be specific about colors, textures, lighting, and composition where relevant
+        3. Keep the prompt concise, ideally no more than 2-3 sentences
+        4. Use simple, direct language.
+        5. Avoid abstract concepts or metaphors.
+        6. Include sensory details that an autistic child might find engaging.
+        7. Use descriptive adjectives to enhance visual quality
+
+        Write the prompt for each fragment inside <image_prompt id="n"> tags, using the same id as the corresponding fragment. Create exactly one prompt per fragment.
+        """
+
+    def _format_batch_prompt_spanish(self, story_segments: List[str]) -> str:
+        """
+        Formata o prompt em lote em espanhol.
+
+        :param story_segments: Os segmentos de história que serão inseridos no prompt.
+        :return: Uma string formatada com o prompt em espanhol.
+        """
+        return f"""
+        Su tarea es crear un mensaje de imagen claro, específico y conciso para cada uno de los {len(story_segments)} fragmentos de historia a continuación. Su objetivo es capturar los elementos visuales clave de cada fragmento y traducirlos en un mensaje que pueda usarse para generar una imagen.
+
+        {self._format_segments(story_segments)}
+
+        Directrices para crear cada mensaje de imagen:
+        1. Céntrese en los elementos visualmente más impactantes o importantes del fragmento de la historia.
+        2. Sea específico sobre colores, texturas, iluminación y composición cuando sea relevante.
+        3. Mantenga el mensaje conciso, idealmente no más de 2 o 3 oraciones.
+        4. Utilice un lenguaje sencillo y directo.
+        5. Evite conceptos abstractos o metáforas.
+        6. Incluya detalles sensoriales que un niño autista pueda encontrar atractivos.
+        7. Utilice adjetivos descriptivos para mejorar la calidad visual.
+
+        Escriba el mensaje de cada fragmento dentro de etiquetas <image_prompt id="n">, usando el mismo id del fragmento correspondiente. Cree exactamente un mensaje por fragmento.
+        """
+
+    def format_batch_prompt(self, story_segments: List[str]) -> str:
+        """
+        Formata um único prompt, no idioma selecionado, que pede um prompt de imagem indexado para cada segmento.
+
+        :param story_segments: Os segmentos de história que serão inseridos no prompt.
+        :return: A string formatada com o prompt no idioma selecionado.
+        :raises ValueError: Se o idioma não for suportado.
+        """
+        if self.language in self.batch_prompts:
+            return self.batch_prompts[self.language](story_segments)
+        else:
+            raise ValueError(f"Idioma não suportado: {self.language}. Escolha entre português, inglês ou espanhol.")
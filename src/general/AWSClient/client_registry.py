@@ -0,0 +1,120 @@
+import threading
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+from typing import Any, Dict, Optional, Tuple
+from src.general.Resilience.resilience import THROTTLE, RETRY, FAIL
+
+# Códigos de erro do Bedrock que indicam throttling ou falhas transitórias
+BEDROCK_THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+BEDROCK_RETRY_CODES = {"ServiceUnavailableException", "InternalServerException", "ModelNotReadyException", "ModelTimeoutException"}
+
+
+class AWSClientRegistry:
+    """
+    Registro de clientes boto3 compartilhados pelo processo, indexados por (serviço, região).
+    
+    Clientes boto3 são thread-safe depois de criados, mas a criação não é; o registro serializa a criação
+    e reaproveita o mesmo cliente (e seu pool de conexões HTTP/TLS) em todas as chamadas seguintes.
+    
+    Métodos:
+        __init__(self, max_pool_connections: int, connect_timeout: float, read_timeout: float, tcp_keepalive: bool): Inicializa o registro.
+        configure(self, **settings): Altera as configurações de conexão e descarta os clientes já criados.
+        get_client(self, service_name: str, region_name: Optional[str]) -> Any: Retorna o cliente compartilhado.
+    """
+
+    def __init__(self, max_pool_connections: int = 50, connect_timeout: float = 5, read_timeout: float = 120,
+                 tcp_keepalive: bool = True):
+        """
+        :param max_pool_connections: Tamanho máximo do pool de conexões de cada cliente (padrão: 50).
+        :param connect_timeout: Tempo limite de conexão em segundos (padrão: 5).
+        :param read_timeout: Tempo limite de leitura em segundos (padrão: 120).
+        :param tcp_keepalive: Se True, habilita TCP keep-alive nas conexões (padrão: True).
+        """
+        self.max_pool_connections = max_pool_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.tcp_keepalive = tcp_keepalive
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, **settings):
+        """
+        Altera as configurações de conexão (max_pool_connections, connect_timeout, read_timeout, tcp_keepalive).
+        Os clientes já criados são descartados para que as novas configurações sejam aplicadas.
+        
+        :param settings: As configurações a serem alteradas.
+        :raises ValueError: Se uma configuração desconhecida for informada.
+        """
+        with self._lock:
+            for name, value in settings.items():
+                if name not in ("max_pool_connections", "connect_timeout", "read_timeout", "tcp_keepalive"):
+                    raise ValueError(f"Configuração desconhecida: {name}")
+                setattr(self, name, value)
+            self._clients.clear()
+
+    def _build_config(self) -> Config:
+        """
+        Gera a configuração do botocore com as opções de conexão do registro. Os retries internos do botocore
+        ficam desligados: eles são feitos pelo ResilientCaller de cada provedor (src.general.Resilience).
+        
+        :return: A configuração do cliente.
+        """
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            tcp_keepalive=self.tcp_keepalive,
+            retries={"max_attempts": 0, "mode": "standard"},
+        )
+
+    def get_client(self, service_name: str = "bedrock-runtime", region_name: Optional[str] = None) -> Any:
+        """
+        Retorna o cliente compartilhado para o serviço e a região, criando-o na primeira chamada.
+        
+        :param service_name: O nome do serviço AWS (padrão: "bedrock-runtime").
+        :param region_name: A região AWS (padrão: a região configurada no ambiente).
+        :return: O cliente boto3.
+        """
+        key = (service_name, region_name)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = boto3.client(service_name, region_name=region_name, config=self._build_config())
+            return self._clients[key]
+
+
+# Registro compartilhado por todos os geradores do processo
+client_registry = AWSClientRegistry()
+
+
+def get_client(service_name: str = "bedrock-runtime", region_name: Optional[str] = None) -> Any:
+    """
+    Retorna o cliente boto3 compartilhado do registro do processo.
+    
+    :param service_name: O nome do serviço AWS (padrão: "bedrock-runtime").
+    :param region_name: A região AWS (padrão: a região configurada no ambiente).
+    :return: O cliente boto3.
+    """
+    return client_registry.get_client(service_name, region_name)
+
+
+def classify_bedrock_error(error: Exception) -> str:
+    """
+    Classifica um erro de chamada ao Bedrock para o ResilientCaller.
+    
+    :param error: O erro lançado pelo cliente boto3.
+    :return: THROTTLE, RETRY ou FAIL.
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        if code in BEDROCK_THROTTLE_CODES:
+            return THROTTLE
+        if code in BEDROCK_RETRY_CODES:
+            return RETRY
+        return FAIL
+    if isinstance(error, (BotoConnectionError, ReadTimeoutError)):
+        return RETRY
+    return FAIL
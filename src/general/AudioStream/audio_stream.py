@@ -0,0 +1,84 @@
+import base64
+from typing import Any, Callable
+
+
+class IncrementalBase64Encoder:
+    """
+    Codificador base64 incremental: recebe os bytes em pedaços de qualquer tamanho e devolve o base64
+    correspondente aos grupos completos de 3 bytes, guardando o restante para o próximo pedaço.
+    A concatenação das saídas é idêntica a base64.b64encode do conteúdo inteiro.
+    
+    Métodos:
+        feed(self, data: bytes) -> str: Codifica um pedaço e retorna o base64 já disponível.
+        finish(self) -> str: Codifica os bytes restantes (com padding).
+    """
+
+    def __init__(self):
+        self._pending = b''
+
+    def feed(self, data: bytes) -> str:
+        """
+        :param data: O pedaço de bytes recebido.
+        :return: O base64 dos grupos completos de 3 bytes disponíveis.
+        """
+        data = self._pending + data
+        complete = len(data) - len(data) % 3
+        self._pending = data[complete:]
+        return base64.b64encode(data[:complete]).decode('ascii')
+
+    def finish(self) -> str:
+        """
+        :return: O base64 dos bytes restantes, com padding.
+        """
+        pending, self._pending = self._pending, b''
+        return base64.b64encode(pending).decode('ascii')
+
+
+def sink_writer(sink: Any) -> Callable[[bytes], Any]:
+    """
+    Retorna a função de escrita de um destino de bytes: um socket (sendall), um arquivo
+    ou buffer aberto em modo binário (write) ou uma função que recebe bytes.
+    
+    :param sink: O destino dos bytes.
+    :return: A função que escreve um pedaço de bytes no destino.
+    :raises TypeError: Se o destino não for suportado.
+    """
+    if hasattr(sink, "sendall"):
+        return sink.sendall
+    if hasattr(sink, "write"):
+        return sink.write
+    if callable(sink):
+        return sink
+    raise TypeError(f"Destino de áudio não suportado: {type(sink).__name__}")
+
+
+class Base64Sink:
+    """
+    Destino que codifica em base64, incrementalmente, os bytes recebidos e os repassa como texto
+    para outro destino (e.g., um arquivo texto ou uma conexão que espera base64).
+    
+    Métodos:
+        write(self, data: bytes): Codifica o pedaço e escreve o base64 disponível.
+        close(self): Escreve os bytes restantes (com padding).
+    """
+
+    def __init__(self, text_sink: Any):
+        """
+        :param text_sink: O destino do texto base64 (objeto com write(str) ou função que recebe str).
+        """
+        self._write = text_sink.write if hasattr(text_sink, "write") else text_sink
+        self._encoder = IncrementalBase64Encoder()
+
+    def write(self, data: bytes):
+        """
+        :param data: O pedaço de bytes recebido.
+        """
+        encoded = self._encoder.feed(data)
+        if encoded:
+            self._write(encoded)
+
+    def close(self):
+        """Escreve os bytes restantes, com padding"""
+        encoded = self._encoder.finish()
+        if encoded:
+            self._write(encoded)
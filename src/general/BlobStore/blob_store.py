@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import tempfile
+from typing import Any, Dict, Iterator
+
+# Extensões dos tipos mais usados pelo pipeline (mimetypes pode variar entre sistemas)
+_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp", "audio/mpeg": ".mp3"}
+
+
+class BlobStore:
+    """
+    Armazenamento de arquivos binários endereçados pelo conteúdo: cada blob é gravado uma única vez,
+    com o SHA-256 dos bytes como nome, o que torna as gravações idempotentes e livres de colisão.
+    O pipeline passa apenas referências leves {hash, size, mime}; o base64 é gerado só na borda.
+    
+    Métodos:
+        __init__(self, root: str): Inicializa o armazenamento no diretório informado.
+        put(self, data: bytes, mime: str) -> Dict[str, Any]: Grava os bytes e retorna a referência.
+        put_base64(self, base64_data: str, mime: str) -> Dict[str, Any]: Decodifica o base64 uma vez e grava os bytes.
+        path(self, ref: Dict[str, Any]) -> str: Retorna o caminho do arquivo do blob.
+        get(self, ref: Dict[str, Any]) -> bytes: Lê os bytes do blob.
+        iter_chunks(self, ref: Dict[str, Any], chunk_size: int) -> Iterator[bytes]: Lê o blob em pedaços.
+        to_base64(self, ref: Dict[str, Any]) -> str: Codifica o blob em base64 (para clientes que precisam do formato).
+    """
+
+    def __init__(self, root: str = "output/blobs"):
+        """
+        :param root: O diretório raiz do armazenamento (padrão: "output/blobs").
+        """
+        self.root = root
+
+    def _path_for(self, digest: str, mime: str) -> str:
+        """
+        Monta o caminho do blob, com os dois primeiros caracteres do hash como subdiretório.
+        
+        :param digest: O SHA-256 dos bytes, em hexadecimal.
+        :param mime: O tipo MIME do blob.
+        :return: O caminho do arquivo.
+        """
+        extension = _EXTENSIONS.get(mime) or mimetypes.guess_extension(mime) or ""
+        return os.path.join(self.root, digest[:2], digest + extension)
+
+    def put(self, data: bytes, mime: str = "application/octet-stream") -> Dict[str, Any]:
+        """
+        Grava os bytes sob o seu SHA-256. Se o blob já existir, nada é gravado.
+        
+        :param data: Os bytes do blob.
+        :param mime: O tipo MIME do blob (padrão: "application/octet-stream").
+        :return: A referência {hash, size, mime} do blob.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path_for(digest, mime)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Grava em um arquivo temporário e renomeia, para que leitores nunca vejam um blob parcial
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        return {"hash": digest, "size": len(data), "mime": mime}
+
+    def put_base64(self, base64_data: str, mime: str = "application/octet-stream") -> Dict[str, Any]:
+        """
+        Decodifica o base64 uma única vez e grava os bytes.
+        
+        :param base64_data: Os dados em base64.
+        :param mime: O tipo MIME do blob.
+        :return: A referência {hash, size, mime} do blob.
+        """
+        return self.put(base64.b64decode(base64_data), mime)
+
+    def path(self, ref: Dict[str, Any]) -> str:
+        """
+        :param ref: A referência do blob.
+        :return: O caminho do arquivo do blob.
+        """
+        return self._path_for(ref["hash"], ref["mime"])
+
+    def get(self, ref: Dict[str, Any]) -> bytes:
+        """
+        :param ref: A referência do blob.
+        :return: Os bytes do blob.
+        """
+        with open(self.path(ref), "rb") as file:
+            return file.read()
+
+    def iter_chunks(self, ref: Dict[str, Any], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Lê o blob em pedaços, sem carregá-lo inteiro na memória.
+        
+        :param ref: A referência do blob.
+        :param chunk_size: O tamanho de cada pedaço em bytes (padrão: 64 KB).
+        :return: Iterador com os pedaços do blob.
+        """
+        with open(self.path(ref), "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def to_base64(self, ref: Dict[str, Any]) -> str:
+        """
+        Codifica o blob em base64, para clientes que precisam do formato.
+        
+        :param ref: A referência do blob.
+        :return: A string base64 do blob.
+        """
+        return base64.b64encode(self.get(ref)).decode("utf-8")
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from typing import Dict, Optional
+
+
+class DiskLRUCache:
+    """
+    Classe responsável por armazenar valores binários em disco (SQLite), comprimidos com zlib,
+    com evicção LRU baseada no tamanho total ocupado.
+    
+    Cada operação abre a própria conexão, portanto a mesma instância (ou o mesmo arquivo)
+    pode ser usada por várias threads e processos ao mesmo tempo.
+    
+    Métodos:
+        __init__(self, path: str, max_bytes: int, compress: bool, ttl_seconds: Optional[float]): Inicializa o cache no arquivo SQLite indicado.
+        get(self, key: str) -> Optional[bytes]: Retorna o valor armazenado (e ainda válido) para a chave ou None.
+        put(self, key: str, value: bytes): Armazena o valor e aplica a evicção por tamanho.
+        delete(self, key: str): Remove a chave do cache.
+        total_size(self) -> int: Retorna o tamanho total ocupado pelas entradas.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, compress: bool = True,
+                 ttl_seconds: Optional[float] = None):
+        """
+        Inicializa o cache em disco.
+        
+        :param path: Caminho do arquivo SQLite do cache.
+        :param max_bytes: Tamanho máximo, em bytes, ocupado pelas entradas (padrão: 512 MB).
+        :param compress: Se True, comprime os valores com zlib antes de gravar (padrão: True).
+        :param ttl_seconds: Tempo de vida das entradas em segundos (padrão: sem expiração).
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.ttl_seconds = ttl_seconds
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, "
+                "created_at REAL NOT NULL DEFAULT 0)"
+            )
+            # Arquivos criados antes da introdução do TTL não possuem a coluna created_at
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            if "created_at" not in columns:
+                conn.execute("ALTER TABLE entries ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Abre uma conexão com o arquivo SQLite do cache.
+        
+        :return: A conexão aberta.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Retorna o valor armazenado para a chave, atualizando o instante do último acesso.
+        Entradas expiradas (ttl_seconds) são removidas e tratadas como ausentes.
+        
+        :param key: A chave do valor.
+        :return: O valor em bytes ou None caso a chave não esteja no cache.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        value = row[0]
+        return zlib.decompress(value) if self.compress else bytes(value)
+
+    def put(self, key: str, value: bytes):
+        """
+        Armazena o valor para a chave e remove as entradas menos usadas recentemente
+        enquanto o tamanho total ultrapassar o limite.
+        
+        :param key: A chave do valor.
+        :param value: O valor em bytes.
+        """
+        stored = zlib.compress(value) if self.compress else value
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, stored, len(stored), now, now),
+            )
+            self._evict(conn)
+
+    def delete(self, key: str):
+        """
+        Remove a chave do cache.
+        
+        :param key: A chave a ser removida.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def total_size(self) -> int:
+        """
+        Retorna o tamanho total, em bytes, ocupado pelas entradas do cache.
+        
+        :return: A soma dos tamanhos armazenados.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        """
+        Remove as entradas expiradas e, em seguida, as menos usadas recentemente até o tamanho total respeitar o limite.
+        
+        :param conn: A conexão (com transação aberta) usada na operação.
+        """
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class CountingDiskCache:
+    """
+    Classe responsável por envolver um DiskLRUCache de valores binários e contar, neste processo,
+    os acertos e falhas das consultas. É a base dos caches de mídia (imagens e áudios), que definem
+    apenas o arquivo do cache e como montar as chaves.
+    
+    Métodos:
+        __init__(self, path: str, max_bytes: int, compress: bool): Inicializa o cache no arquivo SQLite indicado.
+        get(self, key: str) -> Optional[bytes]: Retorna o valor armazenado ou None, contabilizando acerto ou falha.
+        put(self, key: str, value: bytes): Armazena o valor.
+        stats(self) -> Dict[str, float]: Retorna os contadores de acertos e falhas e a taxa de acertos.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, compress: bool = True):
+        """
+        :param path: Caminho do arquivo SQLite do cache.
+        :param max_bytes: Tamanho máximo do cache em bytes (padrão: 512 MB).
+        :param compress: Se True, comprime os valores com zlib; use False para formatos já comprimidos (padrão: True).
+        """
+        self.store = DiskLRUCache(path, max_bytes=max_bytes, compress=compress)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        :param key: A chave do valor.
+        :return: Os bytes armazenados ou None em caso de falha.
+        """
+        value = self.store.get(key)
+        with self._lock:
+            self._counters["hits" if value is not None else "misses"] += 1
+        return value
+
+    def put(self, key: str, value: bytes):
+        """
+        :param key: A chave do valor.
+        :param value: Os bytes a armazenar.
+        """
+        self.store.put(key, value)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Retorna os contadores de acertos e falhas deste processo e a taxa de acertos.
+        
+        :return: Dicionário com os contadores.
+        """
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(self._counters, hit_ratio=self._counters["hits"] / lookups if lookups else 0.0)
@@ -0,0 +1,40 @@
+import hashlib
+import json
+import os
+from src.general.Cache.disk_cache import CountingDiskCache
+
+
+class ImageCache(CountingDiskCache):
+    """
+    Classe responsável por armazenar em disco as imagens geradas, indexadas pelos parâmetros da geração
+    (model_id, prompt, style_preset, cfg_scale, steps, seed), com evicção LRU baseada no tamanho total.
+    As imagens são guardadas como bytes PNG, sem compressão adicional.
+    
+    Métodos:
+        __init__(self, cache_dir: str, max_bytes: int): Inicializa o cache no diretório indicado.
+        make_key(model_id: str, prompt: str, style_preset: str, cfg_scale: float, steps: int, seed: int) -> str: Gera a chave de uma geração.
+        get, put e stats: Herdados de CountingDiskCache.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", max_bytes: int = 1024 * 1024 * 1024):
+        """
+        :param cache_dir: Diretório onde o arquivo do cache será criado (padrão: ".cache").
+        :param max_bytes: Tamanho máximo do cache em bytes (padrão: 1 GB).
+        """
+        super().__init__(os.path.join(cache_dir, "images.sqlite3"), max_bytes=max_bytes, compress=False)
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, style_preset: str, cfg_scale: float, steps: int, seed: int) -> str:
+        """
+        Gera a chave do cache de uma geração de imagem.
+        
+        :param model_id: O id do modelo.
+        :param prompt: O prompt da imagem.
+        :param style_preset: O estilo da imagem.
+        :param cfg_scale: Escala de orientação de configuração.
+        :param steps: Número de passos da geração.
+        :param seed: A semente da geração.
+        :return: A chave do cache.
+        """
+        params = json.dumps([prompt, style_preset, cfg_scale, steps, seed], ensure_ascii=False)
+        return f"{model_id}:{hashlib.sha256(params.encode('utf-8')).hexdigest()}"
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from src.general.Cache.disk_cache import DiskLRUCache
+
+
+class LLMResponseCache:
+    """
+    Classe responsável por armazenar as respostas do modelo de texto, indexadas por (model_id, max_tokens, hash do prompt),
+    em dois níveis: um LRU em memória, por processo, e um arquivo SQLite em disco, compartilhado entre processos.
+    
+    Métodos:
+        __init__(self, cache_dir: str, max_memory_entries: int, max_bytes: int, ttl_seconds: Optional[float]): Inicializa o cache.
+        make_key(model_id: str, max_tokens: int, prompt: str) -> str: Gera a chave de uma chamada.
+        get(self, key: str) -> Optional[str]: Retorna a resposta armazenada ou None.
+        put(self, key: str, response: str): Armazena a resposta nos dois níveis.
+        stats(self) -> Dict[str, int]: Retorna os contadores de acertos e falhas.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", max_memory_entries: int = 256,
+                 max_bytes: int = 256 * 1024 * 1024, ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        """
+        :param cache_dir: Diretório onde o arquivo do cache será criado (padrão: ".cache").
+        :param max_memory_entries: Quantidade máxima de respostas no nível em memória (padrão: 256).
+        :param max_bytes: Tamanho máximo do nível em disco em bytes (padrão: 256 MB).
+        :param ttl_seconds: Tempo de vida das respostas em segundos (padrão: 7 dias; None para não expirar).
+        """
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = DiskLRUCache(os.path.join(cache_dir, "llm_responses.sqlite3"), max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(model_id: str, max_tokens: int, prompt: str) -> str:
+        """
+        Gera a chave do cache de uma chamada ao modelo.
+        
+        :param model_id: O id do modelo.
+        :param max_tokens: O limite de tokens da resposta.
+        :param prompt: O prompt enviado.
+        :return: A chave do cache.
+        """
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return f"{model_id}:{max_tokens}:{prompt_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retorna a resposta armazenada, consultando primeiro a memória e depois o disco.
+        
+        :param key: A chave da chamada.
+        :return: A resposta ou None em caso de falha.
+        """
+        with self._lock:
+            if key in self._memory:
+                # O nível em memória também respeita o TTL por meio do instante de criação
+                response, created_at = self._memory[key]
+                if self.ttl_seconds is None or time.time() - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return response
+                del self._memory[key]
+
+        value = self.store.get(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        response = value.decode('utf-8')
+        self._remember(key, response)
+        return response
+
+    def put(self, key: str, response: str):
+        """
+        Armazena a resposta nos níveis em memória e em disco.
+        
+        :param key: A chave da chamada.
+        :param response: A resposta do modelo.
+        """
+        self._remember(key, response)
+        self.store.put(key, response.encode('utf-8'))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna os contadores de acertos (memória e disco) e falhas deste processo.
+        
+        :return: Dicionário com os contadores.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def _remember(self, key: str, response: str):
+        """Armazena a resposta no nível em memória, descartando a menos usada recentemente"""
+        with self._lock:
+            self._memory[key] = (response, time.time())
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
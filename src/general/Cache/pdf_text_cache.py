@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+from src.general.Cache.disk_cache import DiskLRUCache
+
+
+def file_sha256(filename: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo-o em blocos.
+    
+    :param filename: O caminho do arquivo.
+    :param block_size: Tamanho de cada bloco lido (padrão: 1 MB).
+    :return: O hash SHA-256 em hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """
+    Classe responsável por armazenar em disco o texto limpo de cada página de um PDF,
+    endereçado pelo SHA-256 do arquivo e pela versão do limpador de texto.
+    
+    Métodos:
+        __init__(self, cache_dir: str, max_bytes: int): Inicializa o cache no diretório indicado.
+        make_key(self, filename: str, cleaner_version: str) -> str: Gera a chave de um PDF.
+        get_pages(self, key: str) -> Optional[List[str]]: Retorna as páginas limpas armazenadas ou None.
+        put_pages(self, key: str, pages: List[str]): Armazena as páginas limpas de um PDF.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", max_bytes: int = 256 * 1024 * 1024):
+        """
+        Inicializa o cache de texto de PDFs.
+        
+        :param cache_dir: Diretório onde o arquivo do cache será criado (padrão: ".cache").
+        :param max_bytes: Tamanho máximo do cache em bytes (padrão: 256 MB).
+        """
+        self.store = DiskLRUCache(os.path.join(cache_dir, "pdf_text.sqlite3"), max_bytes=max_bytes)
+
+    def make_key(self, filename: str, cleaner_version: str) -> str:
+        """
+        Gera a chave do cache a partir do conteúdo do arquivo e da versão do limpador.
+        
+        :param filename: O caminho do arquivo PDF.
+        :param cleaner_version: A versão do limpador de texto usado.
+        :return: A chave do cache.
+        """
+        return f"{file_sha256(filename)}:{cleaner_version}"
+
+    def get_pages(self, key: str) -> Optional[List[str]]:
+        """
+        Retorna as páginas limpas armazenadas para a chave.
+        
+        :param key: A chave do PDF.
+        :return: Lista com o texto limpo de cada página ou None se não houver entrada.
+        """
+        value = self.store.get(key)
+        if value is None:
+            return None
+        return json.loads(value.decode('utf-8'))
+
+    def put_pages(self, key: str, pages: List[str]):
+        """
+        Armazena as páginas limpas de um PDF.
+        
+        :param key: A chave do PDF.
+        :param pages: Lista com o texto limpo de cada página.
+        """
+        self.store.put(key, json.dumps(pages, ensure_ascii=False).encode('utf-8'))
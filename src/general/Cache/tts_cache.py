@@ -0,0 +1,51 @@
+import hashlib
+import os
+import unicodedata
+from src.general.Cache.disk_cache import CountingDiskCache
+
+
+class TTSCache(CountingDiskCache):
+    """
+    Classe responsável por armazenar em disco os áudios sintetizados, indexados por (modelo, voice_id, stability,
+    similarity_boost, hash do texto normalizado), com evicção LRU baseada no tamanho total.
+    Os áudios são guardados como bytes MP3, sem compressão adicional.
+    
+    Métodos:
+        __init__(self, cache_dir: str, max_bytes: int): Inicializa o cache no diretório indicado.
+        normalize_text(text: str) -> str: Normaliza o texto (Unicode NFC e espaços) antes do hash.
+        make_key(model: str, voice_id: str, stability: float, similarity_boost: float, text: str) -> str: Gera a chave de uma síntese.
+        get, put e stats: Herdados de CountingDiskCache.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", max_bytes: int = 512 * 1024 * 1024):
+        """
+        :param cache_dir: Diretório onde o arquivo do cache será criado (padrão: ".cache").
+        :param max_bytes: Tamanho máximo do cache em bytes (padrão: 512 MB).
+        """
+        super().__init__(os.path.join(cache_dir, "tts_audio.sqlite3"), max_bytes=max_bytes, compress=False)
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        Normaliza o texto para que variações que não mudam a fala (forma Unicode, espaços repetidos
+        ou nas bordas) compartilhem a mesma entrada.
+        
+        :param text: O texto a ser sintetizado.
+        :return: O texto normalizado.
+        """
+        return unicodedata.normalize("NFC", ' '.join(text.split()))
+
+    @staticmethod
+    def make_key(model: str, voice_id: str, stability: float, similarity_boost: float, text: str) -> str:
+        """
+        Gera a chave do cache de uma síntese.
+        
+        :param model: O modelo de voz.
+        :param voice_id: O id da voz.
+        :param stability: Estabilidade da voz.
+        :param similarity_boost: Nível de boost de similaridade da voz.
+        :param text: O texto sintetizado.
+        :return: A chave do cache.
+        """
+        text_hash = hashlib.sha256(TTSCache.normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{model}:{voice_id}:{stability}:{similarity_boost}:{text_hash}"
@@ -1,6 +1,14 @@
+import hashlib
 import random
+import re
 import string
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from src.general.TokenCounter.token_counter import CHARS_PER_TOKEN, estimate_tokens
+
+# Fim de sentença (pontuação seguida de espaço) ou quebra de parágrafo (linha em branco)
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_WHITESPACE = re.compile(r'\s+')
 
 class ChunkedText:
     def __init__(self, data: List[Dict[str, Any]], chunk_size: int, overlap: int):
@@ -41,22 +49,208 @@ class ChunkedText:
                     chunked_data.append(new_entry)
         return chunked_data
 
-# Exemplo de uso:
-data = [{
-    'id': '0XeLRkpJQxFh',
-    'metadata': {
-        'embedding': 'none por enquanto',
-        'text': 'ROMA ANTIGA Prof. João RochaLINHA DO TEMPO 753 a.C. 509 a.C. 27 a.C. 476 d.C. MONARQUIA Fundação de Roma Domínio Etrusco Conflitos plebeus patrícios Formação das estruturas sociais e políticas romanasREPÚBLICA Predomínio do Senado Guerras Púnicas Expansionismo militar Roma como superpotência Revoltas de escravosIMPÉRIO Auge da dominação romana PaxRomana Problemas fronteiriços com bárbaros Divisão do Império Queda de Roma a.C. d.C.FORMAÇÃO APenínsula Itálica foi ocupada por a .',
-        'filename': './src/documents/Roma Antiga.pdf'
-    }
-}]
-
-chunk_size = 100
-overlap = 20
-
-chunker = ChunkedText(data, chunk_size, overlap)
-chunked_data = chunker.chunk_structure()
-
-# Exibir resultado:
-for entry in chunked_data:
-    print(entry)
+    def chunk_pages(self, pages: Iterable[Tuple[int, str, str]], filename: str = '') -> Iterator[Dict[str, Any]]:
+        """
+        Gera os chunks de forma preguiçosa a partir de um iterador de páginas (page_number, raw_text, cleaned_text).
+        Mantém em memória apenas o trecho ainda não emitido, e produz os mesmos chunks que
+        chunk_structure produziria para as páginas limpas unidas por espaço.
+        """
+        step = self.chunk_size - self.overlap
+        buffer = ''
+        first_page = True
+        for _, _, cleaned_text in pages:
+            buffer = cleaned_text if first_page else f"{buffer} {cleaned_text}"
+            first_page = False
+            while len(buffer) >= self.chunk_size:
+                yield self._new_entry(buffer[:self.chunk_size], filename)
+                buffer = buffer[step:]
+        while buffer:
+            yield self._new_entry(buffer[:self.chunk_size], filename)
+            buffer = buffer[step:]
+
+    def _new_entry(self, chunk: str, filename: str) -> Dict[str, Any]:
+        """Cria a estrutura de um chunk gerado por chunk_pages"""
+        return {
+            'id': self._generate_id(),
+            'metadata': {
+                'embedding': 'none por enquanto',
+                'text': chunk,
+                'filename': filename
+            }
+        }
+
+
+class ChunkView:
+    """
+    Registro compacto de um chunk: guarda apenas o id do documento e os offsets (start, end)
+    no texto de origem compartilhado. O texto só é materializado quando solicitado.
+    
+    Métodos:
+        text (property) -> str: Materializa o texto do chunk.
+        id (property) -> str: Id determinístico do chunk, estável entre execuções.
+        to_entry(self, filename: str) -> Dict[str, Any]: Gera a estrutura usada por ChunkedText.
+    """
+
+    __slots__ = ('doc_id', 'start', 'end', '_source')
+
+    def __init__(self, doc_id: str, start: int, end: int, source: str):
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+        self._source = source
+
+    @property
+    def text(self) -> str:
+        """Materializa o texto do chunk a partir do texto de origem"""
+        return self._source[self.start:self.end]
+
+    @property
+    def id(self) -> str:
+        """Gera o id do chunk a partir do documento e dos offsets"""
+        return hashlib.sha256(f"{self.doc_id}:{self.start}:{self.end}".encode('utf-8')).hexdigest()[:16]
+
+    def to_entry(self, filename: str = '') -> Dict[str, Any]:
+        """Gera a estrutura de dicionário usada por ChunkedText.chunk_structure"""
+        return {
+            'id': self.id,
+            'metadata': {
+                'embedding': 'none por enquanto',
+                'text': self.text,
+                'filename': filename
+            }
+        }
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"ChunkView(doc_id={self.doc_id!r}, start={self.start}, end={self.end})"
+
+
+class SentenceChunker:
+    """
+    Divide o texto em chunks que respeitam os limites de sentença e de parágrafo,
+    buscando um número alvo de tokens por chunk em vez de um número de caracteres.
+    
+    Métodos:
+        __init__(self, target_tokens: int, overlap_sentences: int): Inicializa o chunker.
+        chunk_text(self, text: str, doc_id: Optional[str]) -> List[ChunkView]: Divide um texto em chunks.
+        chunk_structure(self, data: List[Dict[str, Any]]) -> List[ChunkView]: Divide cada entrada da estrutura em chunks.
+    """
+
+    def __init__(self, target_tokens: int = 256, overlap_sentences: int = 0):
+        """
+        :param target_tokens: Número alvo de tokens por chunk (padrão: 256).
+        :param overlap_sentences: Quantidade de sentenças repetidas no início do chunk seguinte (padrão: 0).
+        """
+        self.target_tokens = target_tokens
+        self.overlap_sentences = overlap_sentences
+
+    @staticmethod
+    def document_id(text: str) -> str:
+        """Gera um id determinístico para o documento a partir do seu conteúdo"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def _sentence_spans(self, text: str) -> List[Tuple[int, int, bool]]:
+        """
+        Localiza as sentenças do texto.
+        Retorna tuplas (start, end, fim_de_paragrafo); sentenças maiores que o alvo são
+        subdivididas em limites de palavra.
+        """
+        spans = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(text):
+            if match.start() > start:
+                is_paragraph_end = _PARAGRAPH_BREAK.search(match.group()) is not None
+                spans.extend(self._split_long_span(text, start, match.start(), is_paragraph_end))
+            start = match.end()
+        end = len(text.rstrip())
+        if end > start:
+            spans.extend(self._split_long_span(text, start, end, True))
+        return spans
+
+    def _split_long_span(self, text: str, start: int, end: int, is_paragraph_end: bool) -> List[Tuple[int, int, bool]]:
+        """Subdivide uma sentença maior que o alvo de tokens em limites de palavra"""
+        max_chars = self.target_tokens * CHARS_PER_TOKEN
+        if end - start <= max_chars:
+            return [(start, end, is_paragraph_end)]
+        pieces = []
+        while end - start > max_chars:
+            cut = start + max_chars
+            # Corta no último espaço antes do limite; sem espaço, corta no próprio limite
+            last_space = None
+            for last_space in _WHITESPACE.finditer(text, start + 1, cut):
+                pass
+            if last_space is not None:
+                pieces.append((start, last_space.start(), False))
+                start = last_space.end()
+            else:
+                pieces.append((start, cut, False))
+                start = cut
+        if end > start:
+            pieces.append((start, end, is_paragraph_end))
+        return pieces
+
+    def chunk_text(self, text: str, doc_id: Optional[str] = None) -> List[ChunkView]:
+        """
+        Divide o texto em chunks agrupando sentenças até atingir o alvo de tokens.
+        Um chunk também é encerrado em uma quebra de parágrafo quando já tem pelo menos metade do alvo.
+        
+        :param text: O texto de origem, compartilhado por todos os chunks.
+        :param doc_id: Id do documento (padrão: hash do conteúdo).
+        :return: Lista de ChunkView em ordem.
+        """
+        doc_id = doc_id if doc_id is not None else self.document_id(text)
+        spans = self._sentence_spans(text)
+        chunks = []
+        first = 0
+        while first < len(spans):
+            last = first
+            while (last + 1 < len(spans)
+                   and not (spans[last][2] and self._tokens(text, spans[first][0], spans[last][1]) * 2 >= self.target_tokens)
+                   and self._tokens(text, spans[first][0], spans[last + 1][1]) <= self.target_tokens):
+                last += 1
+            chunks.append(ChunkView(doc_id, spans[first][0], spans[last][1], text))
+            # Recua as sentenças de sobreposição, garantindo sempre algum avanço
+            first = max(last + 1 - self.overlap_sentences, first + 1)
+        return chunks
+
+    def chunk_structure(self, data: List[Dict[str, Any]]) -> List[ChunkView]:
+        """
+        Divide o texto de cada entrada da estrutura (metadata.text) em chunks.
+        
+        :param data: Estrutura no formato de PDFExtractor.get_data.
+        :return: Lista de ChunkView de todas as entradas, em ordem.
+        """
+        chunks = []
+        for entry in data:
+            if 'metadata' in entry and 'text' in entry['metadata']:
+                chunks.extend(self.chunk_text(entry['metadata']['text']))
+        return chunks
+
+    @staticmethod
+    def _tokens(text: str, start: int, end: int) -> int:
+        """Estima os tokens do trecho text[start:end]"""
+        return estimate_tokens(text[start:end])
+
+
+if __name__ == "__main__":
+    # Exemplo de uso:
+    data = [{
+        'id': '0XeLRkpJQxFh',
+        'metadata': {
+            'embedding': 'none por enquanto',
+            'text': 'ROMA ANTIGA Prof. João RochaLINHA DO TEMPO 753 a.C. 509 a.C. 27 a.C. 476 d.C. MONARQUIA Fundação de Roma Domínio Etrusco Conflitos plebeus patrícios Formação das estruturas sociais e políticas romanasREPÚBLICA Predomínio do Senado Guerras Púnicas Expansionismo militar Roma como superpotência Revoltas de escravosIMPÉRIO Auge da dominação romana PaxRomana Problemas fronteiriços com bárbaros Divisão do Império Queda de Roma a.C. d.C.FORMAÇÃO APenínsula Itálica foi ocupada por a .',
+            'filename': './src/documents/Roma Antiga.pdf'
+        }
+    }]
+
+    chunk_size = 100
+    overlap = 20
+
+    chunker = ChunkedText(data, chunk_size, overlap)
+    chunked_data = chunker.chunk_structure()
+
+    # Exibir resultado:
+    for entry in chunked_data:
+        print(entry)
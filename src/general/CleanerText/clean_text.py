@@ -1,27 +1,103 @@
-from typing import List, Dict, Any
+import copy
 import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+# Caracteres especiais removidos do texto (mantendo pontuações básicas)
+_SPECIAL_CHARACTERS = re.compile(r'[^\w\s,.!?]+')
+
+
+def _clean_text(text: str) -> str:
+    """
+    Limpa uma string: colapsa espaços em branco, remove caracteres especiais e apara as extremidades.
+    
+    str.split() usa a mesma definição de espaço em branco que \\s, então unir as palavras por um espaço
+    equivale a substituir r'\\s+' por ' ' seguido de strip, sem uma segunda passada de regex.
+    
+    :param text: O texto a ser limpo.
+    :return: O texto limpo.
+    """
+    return _SPECIAL_CHARACTERS.sub('', ' '.join(text.split())).strip()
+
+
+def _clean_texts(texts: List[str]) -> List[str]:
+    """
+    Limpa uma lista de textos. Função de módulo para poder ser executada em um pool de processos.
+    
+    :param texts: Lista de textos para limpar.
+    :return: Lista de textos limpos.
+    """
+    return [_clean_text(text) for text in texts]
+
 
 class TextCleaner:
-    def __init__(self, data: List[Dict[str, Any]]):
-        self.data = data
+    """
+    Classe responsável por limpar e formatar o texto extraído de um PDF.
+    
+    Métodos:
+        __init__(self, data: Optional[List[Dict[str, Any]]]): Inicializa a classe com a estrutura opcional de documentos.
+        clean_text(self, text: str) -> str: Aplica regras de limpeza em uma string.
+        clean_text_list(self, texts: List[str]) -> List[str]: Aplica a limpeza em uma lista de strings.
+        clean_many(self, documents: List[List[str]], max_workers: Optional[int]) -> List[List[str]]: Limpa vários documentos, opcionalmente em paralelo.
+        clean_structure(self) -> List[Dict[str, Any]]: Retorna uma cópia da estrutura com o texto limpo.
+    """
+
+    # Versão das regras de limpeza; deve ser alterada sempre que a saída de clean_text mudar,
+    # pois faz parte da chave do cache de texto.
+    VERSION = "1"
+
+    def __init__(self, data: Optional[List[Dict[str, Any]]] = None):
+        """
+        Inicializa a classe TextCleaner.
+        
+        :param data: Estrutura opcional de documentos usada por clean_structure.
+        """
+        self.data = data if data is not None else []
     
     def clean_text(self, text: str) -> str:
-        # Remove múltiplos espaços em branco
-        text = re.sub(r'\s+', ' ', text)
+        """
+        Remove múltiplos espaços em branco e caracteres especiais (mantendo pontuações básicas)
+        e apara as extremidades, em uma única passada de regex pré-compilada.
         
-        # Remove caracteres especiais (mantendo pontuações básicas)
-        text = re.sub(r'[^\w\s,.!?]', '', text)
+        :param text: O texto a ser limpo.
+        :return: O texto limpo e formatado.
+        """
+        return _clean_text(text)
+
+    def clean_text_list(self, texts: List[str]) -> List[str]:
+        """
+        Limpa uma lista de textos.
         
-        # Remove espaços em branco no início e no fim
-        text = text.strip()
+        :param texts: Lista de textos para limpar.
+        :return: Lista de textos limpos.
+        """
+        return _clean_texts(texts)
+
+    def clean_many(self, documents: List[List[str]], max_workers: Optional[int] = None) -> List[List[str]]:
+        """
+        Limpa vários documentos (cada um uma lista de páginas), distribuindo-os em um pool de processos.
         
-        return text
+        :param documents: Lista de documentos, cada um representado pela lista de textos de suas páginas.
+        :param max_workers: Número de processos (padrão: número de CPUs). Use 1 para limpar serialmente.
+        :return: Lista de documentos limpos, na mesma ordem da entrada.
+        """
+        if max_workers == 1 or len(documents) <= 1:
+            return [_clean_texts(texts) for texts in documents]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_clean_texts, documents))
 
     def clean_structure(self) -> List[Dict[str, Any]]:
+        """
+        Limpa o texto de cada entrada da estrutura, sem alterar a estrutura original.
+        
+        :return: Uma cópia da estrutura com o campo metadata.text limpo.
+        """
         cleaned_data = []
         for entry in self.data:
             if isinstance(entry, dict) and 'metadata' in entry and 'text' in entry['metadata']:
-                cleaned_text = self.clean_text(entry['metadata']['text'])
-                entry['metadata']['text'] = cleaned_text
+                entry = {**entry, 'metadata': {**entry['metadata'], 'text': self.clean_text(entry['metadata']['text'])}}
+            else:
+                entry = copy.deepcopy(entry)
             cleaned_data.append(entry)
         return cleaned_data
+
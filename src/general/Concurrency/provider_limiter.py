@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+# Limites padrão de chamadas simultâneas por provedor
+DEFAULT_PROVIDER_LIMITS = {
+    "bedrock-claude": 8,
+    "bedrock-stable-diffusion": 4,
+    "elevenlabs": 2,
+}
+
+
+class ProviderLimiter:
+    """
+    Classe responsável por executar chamadas bloqueantes dos SDKs (boto3, ElevenLabs) a partir de código asyncio,
+    em um executor de threads dedicado, limitando as chamadas simultâneas de cada provedor com um semáforo.
+    
+    Métodos:
+        __init__(self, limits: Optional[Dict[str, int]], max_threads: int): Inicializa os limites e o executor.
+        set_limit(self, provider: str, limit: int): Altera o limite de chamadas simultâneas de um provedor.
+        run(self, provider: str, func: Callable, *args, **kwargs) -> Any: Executa a chamada respeitando o limite do provedor.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, max_threads: int = 32):
+        """
+        :param limits: Limite de chamadas simultâneas por provedor (padrão: DEFAULT_PROVIDER_LIMITS).
+        :param max_threads: Número de threads do executor dedicado (padrão: 32).
+        """
+        self.limits = dict(DEFAULT_PROVIDER_LIMITS if limits is None else limits)
+        self.max_threads = max_threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Semáforos asyncio pertencem a um event loop; mantém um conjunto por loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def set_limit(self, provider: str, limit: int):
+        """
+        Altera o limite de chamadas simultâneas de um provedor. Vale para os event loops que ainda
+        não usaram o provedor.
+        
+        :param provider: O nome do provedor.
+        :param limit: O novo limite.
+        """
+        with self._lock:
+            self.limits[provider] = limit
+            for semaphores in self._semaphores.values():
+                semaphores.pop(provider, None)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Retorna o executor dedicado, criando-o na primeira chamada"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="provider")
+            return self._executor
+
+    def _get_semaphore(self, provider: str) -> asyncio.Semaphore:
+        """Retorna o semáforo do provedor para o event loop atual"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if provider not in semaphores:
+                semaphores[provider] = asyncio.Semaphore(self.limits.get(provider, self.max_threads))
+            return semaphores[provider]
+
+    async def run(self, provider: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa a função bloqueante no executor dedicado, aguardando uma vaga no limite do provedor.
+        
+        :param provider: O nome do provedor.
+        :param func: A função bloqueante.
+        :return: O valor retornado pela função.
+        """
+        async with self._get_semaphore(provider):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+
+
+# Limitador compartilhado por todos os geradores do processo
+provider_limiter = ProviderLimiter()
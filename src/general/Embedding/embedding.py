@@ -0,0 +1,163 @@
+import json
+import re
+import zlib
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from src.general.Chunk.chunk import ChunkView
+
+_WORD = re.compile(r'\w+')
+
+ChunkLike = Union[Dict[str, Any], ChunkView]
+
+
+def _chunk_text(chunk: ChunkLike) -> str:
+    """Retorna o texto de um chunk no formato de ChunkedText.chunk_structure ou de um ChunkView"""
+    return chunk.text if isinstance(chunk, ChunkView) else chunk['metadata']['text']
+
+
+def _chunk_id(chunk: ChunkLike) -> str:
+    """Retorna o id de um chunk no formato de ChunkedText.chunk_structure ou de um ChunkView"""
+    return chunk.id if isinstance(chunk, ChunkView) else chunk['id']
+
+
+class HashingEmbedder:
+    """
+    Classe responsável por gerar embeddings localmente, sem acesso à rede, usando feature hashing
+    de palavras e bigramas (com sinal), frequência sublinear e normalização L2.
+    
+    Métodos:
+        __init__(self, dim: int, use_bigrams: bool): Inicializa o embedder com a dimensão dos vetores.
+        embed(self, text: str) -> np.ndarray: Gera o embedding de um texto.
+        embed_batch(self, texts: Sequence[str]) -> np.ndarray: Gera uma matriz float32 contígua com os embeddings.
+    """
+
+    def __init__(self, dim: int = 1024, use_bigrams: bool = True):
+        """
+        :param dim: Dimensão dos embeddings (padrão: 1024).
+        :param use_bigrams: Se True, inclui bigramas de palavras além das palavras (padrão: True).
+        """
+        self.dim = dim
+        self.use_bigrams = use_bigrams
+
+    def _features(self, text: str) -> Counter:
+        """Extrai as palavras (e bigramas) do texto, em minúsculas"""
+        words = _WORD.findall(text.lower())
+        features = Counter(words)
+        if self.use_bigrams:
+            features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+        return features
+
+    def _embed_into(self, text: str, row: np.ndarray):
+        """Preenche a linha da matriz com o embedding do texto"""
+        for feature, count in self._features(text).items():
+            # crc32 é estável entre execuções, ao contrário de hash()
+            hashed = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if hashed & 1 else -1.0
+            row[(hashed >> 1) % self.dim] += sign * (1.0 + np.log(count))
+        norm = np.linalg.norm(row)
+        if norm > 0:
+            row /= norm
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Gera o embedding de um texto.
+        
+        :param text: O texto.
+        :return: Vetor float32 normalizado.
+        """
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: Sequence[str], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Gera os embeddings de vários textos em uma matriz float32 contígua.
+        
+        :param texts: Os textos.
+        :param out: Matriz (por exemplo, um memmap) de forma (len(texts), dim) a ser preenchida.
+        :return: Matriz com um embedding normalizado por linha.
+        """
+        matrix = out if out is not None else np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(matrix, texts):
+            row[:] = 0.0
+            self._embed_into(text, row)
+        return matrix
+
+
+class ChunkVectorIndex:
+    """
+    Classe responsável por indexar os embeddings dos chunks em uma matriz float32 contígua,
+    opcionalmente mapeada em disco (.npy), e por buscar os chunks mais similares.
+    
+    Métodos:
+        __init__(self, embedder: HashingEmbedder, path: Optional[str]): Inicializa o índice.
+        build(self, chunks: List[ChunkLike]): Gera em lote os embeddings dos chunks.
+        load(self): Carrega um índice salvo em disco (mapeado em memória).
+        search(self, query: Union[str, np.ndarray], k: int) -> List[Tuple[int, float]]: Retorna os k chunks mais similares.
+        centroid(self) -> np.ndarray: Retorna o vetor médio normalizado do documento.
+    """
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None, path: Optional[str] = None):
+        """
+        :param embedder: O embedder usado para chunks e consultas (padrão: HashingEmbedder()).
+        :param path: Caminho opcional do arquivo .npy onde a matriz é mapeada em memória;
+            os ids dos chunks são salvos ao lado, em path + ".ids.json".
+        """
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self.path = path
+        self.matrix: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+
+    def build(self, chunks: List[ChunkLike]):
+        """
+        Gera em lote os embeddings dos chunks (saída de ChunkedText.chunk_structure ou ChunkView).
+        
+        :param chunks: Lista de chunks.
+        """
+        shape = (len(chunks), self.embedder.dim)
+        if self.path is not None:
+            out = np.lib.format.open_memmap(self.path, mode='w+', dtype=np.float32, shape=shape)
+        else:
+            out = np.zeros(shape, dtype=np.float32)
+        self.matrix = self.embedder.embed_batch([_chunk_text(chunk) for chunk in chunks], out=out)
+        self.ids = [_chunk_id(chunk) for chunk in chunks]
+        if self.path is not None:
+            self.matrix.flush()
+            with open(f"{self.path}.ids.json", 'w', encoding='utf-8') as file:
+                json.dump(self.ids, file)
+
+    def load(self):
+        """
+        Carrega, mapeado em memória e somente leitura, um índice previamente salvo em path.
+        """
+        if self.path is None:
+            raise ValueError("O índice não possui um caminho em disco para ser carregado.")
+        self.matrix = np.load(self.path, mmap_mode='r')
+        with open(f"{self.path}.ids.json", 'r', encoding='utf-8') as file:
+            self.ids = json.load(file)
+
+    def centroid(self) -> np.ndarray:
+        """
+        Retorna o vetor médio normalizado dos chunks, que representa o documento como um todo.
+        
+        :return: Vetor float32 normalizado.
+        """
+        mean = np.asarray(self.matrix.mean(axis=0), dtype=np.float32)
+        norm = np.linalg.norm(mean)
+        return mean / norm if norm > 0 else mean
+
+    def search(self, query: Union[str, np.ndarray], k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Busca os k chunks mais similares (similaridade de cosseno) à consulta.
+        
+        :param query: Texto da consulta ou vetor já calculado.
+        :param k: Número de chunks retornados.
+        :return: Lista de tuplas (posição do chunk, similaridade), da mais para a menos similar.
+        """
+        if self.matrix is None or len(self.ids) == 0:
+            return []
+        query_vector = self.embedder.embed(query) if isinstance(query, str) else query
+        scores = self.matrix @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(position), float(scores[position])) for position in top]
@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.general.Embedding.embedding import HashingEmbedder
+
+
+class SimilarPromptIndex:
+    """
+    Classe responsável por indexar os prompts de imagem já gerados (embeddings locais do HashingEmbedder)
+    junto com a referência da imagem gerada, para reaproveitar a imagem quando um novo prompt for
+    quase idêntico (similaridade de cosseno maior ou igual ao limiar) a um prompt anterior.
+    
+    Os prompts ficam em um arquivo SQLite, compartilhado entre execuções, e os vetores em uma matriz em memória.
+    
+    Métodos:
+        __init__(self, cache_dir: str, threshold: float, embedder: Optional[HashingEmbedder]): Inicializa o índice.
+        lookup(self, prompt: str) -> Optional[Dict[str, Any]]: Busca uma imagem reaproveitável para o prompt.
+        record_hit(self): Registra que a imagem encontrada por lookup foi de fato reaproveitada.
+        add(self, prompt: str, image_ref: Dict[str, Any]): Indexa o prompt e a imagem gerada para ele.
+        stats(self) -> Dict[str, Any]: Retorna a taxa de acertos e o histograma das maiores similaridades.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", threshold: float = 0.9, embedder: Optional[HashingEmbedder] = None):
+        """
+        :param cache_dir: Diretório onde o arquivo do índice será criado (padrão: ".cache").
+        :param threshold: Similaridade mínima para reaproveitar uma imagem (padrão: 0.9).
+        :param embedder: O embedder dos prompts (padrão: HashingEmbedder()).
+        """
+        self.path = os.path.join(cache_dir, "image_prompts.sqlite3")
+        self.threshold = threshold
+        self.embedder = embedder if embedder is not None else HashingEmbedder()
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "hits": 0}
+        # Quantidade de consultas por faixa (décimos) da maior similaridade encontrada, para calibrar o limiar
+        self._histogram = [0] * 10
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompts ("
+                "id INTEGER PRIMARY KEY, prompt TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+                "image_ref TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            rows = conn.execute(
+                "SELECT prompt, vector, image_ref FROM prompts WHERE dim = ? ORDER BY id", (self.embedder.dim,)
+            ).fetchall()
+
+        self._prompts: List[str] = [prompt for prompt, _, _ in rows]
+        self._refs: List[Dict[str, Any]] = [json.loads(image_ref) for _, _, image_ref in rows]
+        self._matrix = np.zeros((max(len(rows), 16), self.embedder.dim), dtype=np.float32)
+        for position, (_, vector, _) in enumerate(rows):
+            self._matrix[position] = np.frombuffer(vector, dtype=np.float32)
+
+    def lookup(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca o prompt indexado mais similar ao prompt informado. O candidato só conta como acerto
+        quando quem o reaproveita chama record_hit.
+        
+        :param prompt: O novo prompt de imagem.
+        :return: Dicionário {image_ref, prompt, similarity} se a similaridade atingir o limiar, ou None.
+        """
+        vector = self.embedder.embed(prompt)
+        with self._lock:
+            self._counters["lookups"] += 1
+            count = len(self._prompts)
+            if count == 0:
+                return None
+            scores = self._matrix[:count] @ vector
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            self._histogram[min(max(int(similarity * 10), 0), 9)] += 1
+            if similarity < self.threshold:
+                return None
+            return {"image_ref": self._refs[best], "prompt": self._prompts[best], "similarity": similarity}
+
+    def record_hit(self):
+        """Registra um acerto: a imagem devolvida por lookup foi reaproveitada"""
+        with self._lock:
+            self._counters["hits"] += 1
+
+    def add(self, prompt: str, image_ref: Dict[str, Any]):
+        """
+        Indexa o prompt e a referência da imagem gerada para ele.
+        
+        :param prompt: O prompt de imagem.
+        :param image_ref: A referência {hash, size, mime} da imagem no BlobStore.
+        """
+        vector = self.embedder.embed(prompt)
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.execute(
+                "INSERT INTO prompts (prompt, dim, vector, image_ref, created_at) VALUES (?, ?, ?, ?, ?)",
+                (prompt, self.embedder.dim, vector.tobytes(), json.dumps(image_ref), time.time())
+            )
+        with self._lock:
+            count = len(self._prompts)
+            if count == len(self._matrix):
+                # Dobra a capacidade da matriz para manter as inserções amortizadas em O(1)
+                grown = np.zeros((count * 2, self.embedder.dim), dtype=np.float32)
+                grown[:count] = self._matrix
+                self._matrix = grown
+            self._matrix[count] = vector
+            self._prompts.append(prompt)
+            self._refs.append(image_ref)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores deste processo: consultas, acertos, taxa de acertos, o limiar e o histograma
+        da maior similaridade de cada consulta (por faixa de 0.1), que mostra quantas consultas seriam
+        acertos com outros limiares.
+        
+        :return: Dicionário com as estatísticas.
+        """
+        with self._lock:
+            lookups = self._counters["lookups"]
+            return {
+                "lookups": lookups,
+                "hits": self._counters["hits"],
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "threshold": self.threshold,
+                "indexed_prompts": len(self._prompts),
+                "similarity_histogram": {
+                    f"{bucket / 10:.1f}-{(bucket + 1) / 10:.1f}": count for bucket, count in enumerate(self._histogram)
+                },
+            }
@@ -1,7 +1,94 @@
+import io
+import os
 import random
 import string
 import PyPDF2
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import Dict, Any, BinaryIO, Callable, Iterator, List, Optional, Tuple, Union
+from src.general.CleanerText.clean_text import TextCleaner
+
+PDFSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+
+def spread_page_order(num_pages: int) -> List[int]:
+    """
+    Gera uma ordem de visita das páginas que se espalha uniformemente pelo documento
+    (sequência de van der Corput): 0, n/2, n/4, 3n/4, ... Qualquer prefixo da ordem
+    cobre o documento de forma aproximadamente uniforme.
+    
+    :param num_pages: Número total de páginas.
+    :return: Lista com todos os índices de página (base 0), na ordem de visita.
+    """
+    if num_pages <= 0:
+        return []
+    bits = (num_pages - 1).bit_length()
+    order = []
+    seen = set()
+    for i in range(1 << bits):
+        # Inverte os bits de i para obter a fração de van der Corput em base 2
+        fraction = int(format(i, f'0{bits}b')[::-1], 2) / (1 << bits) if bits else 0.0
+        index = int(fraction * num_pages)
+        if index not in seen:
+            seen.add(index)
+            order.append(index)
+    return order
+
+
+class PDFPageStream:
+    """
+    Classe responsável por percorrer um PDF página a página, sem materializar o documento inteiro.
+    
+    Cada iteração produz uma tupla (page_number, raw_text, cleaned_text), com page_number começando em 1.
+    A origem pode ser um caminho, os bytes do arquivo ou um objeto de arquivo binário.
+    Com sample_evenly, as páginas são visitadas em uma ordem espalhada pelo documento
+    (ver spread_page_order), útil quando o consumidor para antes do fim.
+    
+    Métodos:
+        __init__(self, source: PDFSource, cleaner: Optional[Callable[[str], str]], sample_evenly: bool): Inicializa o stream com a origem do PDF.
+        __iter__(self) -> Iterator[Tuple[int, str, str]]: Extrai e limpa uma página por vez.
+    """
+
+    def __init__(self, source: PDFSource, cleaner: Optional[Callable[[str], str]] = None, sample_evenly: bool = False):
+        """
+        Inicializa o stream de páginas.
+        
+        :param source: Caminho do PDF, conteúdo em bytes ou objeto de arquivo binário.
+        :param cleaner: Função de limpeza aplicada a cada página (padrão: TextCleaner.clean_text).
+        :param sample_evenly: Se True, visita as páginas espalhadas pelo documento em vez de em sequência.
+        """
+        self.source = source
+        self.cleaner = cleaner if cleaner is not None else TextCleaner().clean_text
+        self.sample_evenly = sample_evenly
+
+    @contextmanager
+    def _open(self) -> Iterator[BinaryIO]:
+        """
+        Abre a origem do PDF como um arquivo binário. Arquivos recebidos já abertos não são fechados.
+        
+        :return: O arquivo binário posicionado para leitura.
+        """
+        if isinstance(self.source, (str, os.PathLike)):
+            with open(self.source, 'rb') as file:
+                yield file
+        elif isinstance(self.source, (bytes, bytearray, memoryview)):
+            yield io.BytesIO(self.source)
+        else:
+            yield self.source
+
+    def __iter__(self) -> Iterator[Tuple[int, str, str]]:
+        """
+        Extrai e limpa o texto de uma página por vez.
+        
+        :return: Iterador de tuplas (número da página, texto bruto, texto limpo).
+        """
+        with self._open() as file:
+            reader = PyPDF2.PdfReader(file)
+            num_pages = len(reader.pages)
+            page_order = spread_page_order(num_pages) if self.sample_evenly else range(num_pages)
+            for page_num in page_order:
+                raw_text = reader.pages[page_num].extract_text()
+                yield page_num + 1, raw_text, self.cleaner(raw_text)
+
 
 class PDFExtractor:
     def __init__(self, filename: str):
@@ -13,10 +100,7 @@ class PDFExtractor:
         try:
             with open(self.filename, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page_num in range(len(reader.pages)):
-                    text += reader.pages[page_num].extract_text()
-                return text
+                return "".join(page.extract_text() for page in reader.pages)
         except Exception as e:
             print(f"Erro ao extrair o texto: {e}")
             return ""
@@ -33,4 +117,3 @@ class PDFExtractor:
                 'filename': self.filename
             }
         }]
-
@@ -0,0 +1,147 @@
+import base64
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.general.BlobStore.blob_store import BlobStore
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:  # Pillow é uma dependência opcional, necessária apenas para as variantes
+    Image = None
+    PILLOW_AVAILABLE = False
+
+# Variantes padrão: lado máximo em pixels, formato e qualidade de cada uma
+DEFAULT_VARIANTS = {
+    "thumbnail": {"max_size": 256, "format": "WEBP", "quality": 75},
+    "display": {"max_size": 768, "format": "JPEG", "quality": 85},
+}
+
+_MIME_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg", "PNG": "image/png"}
+
+
+def _render_variants(image_bytes: bytes, variants: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[bytes, int, int]]:
+    """
+    Gera as variantes redimensionadas e recodificadas de uma imagem. Função de módulo para poder ser
+    executada nos processos do pool.
+    
+    :param image_bytes: Os bytes da imagem original.
+    :param variants: As especificações das variantes.
+    :return: Dicionário {nome: (bytes, largura, altura)}.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as original:
+        original = original.convert("RGB")
+        rendered = {}
+        for name, spec in variants.items():
+            image = original.copy()
+            image.thumbnail((spec["max_size"], spec["max_size"]), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format=spec["format"], quality=spec.get("quality", 85))
+            rendered[name] = (buffer.getvalue(), image.width, image.height)
+        return rendered
+
+
+class ImageVariantProcessor:
+    """
+    Classe responsável por pós-processar as imagens geradas, produzindo variantes em tamanhos configuráveis
+    (e.g., miniatura e exibição) em formatos comprimidos (WebP/JPEG). As imagens são processadas em paralelo
+    em um pool de processos, pois o redimensionamento e a codificação são limitados por CPU.
+    Requer a biblioteca Pillow.
+    
+    Métodos:
+        __init__(self, variants: Optional[Dict], max_workers: Optional[int], blob_store: Optional[BlobStore]): Inicializa o processador.
+        process(self, image_bytes: bytes) -> Dict[str, Dict[str, Any]]: Gera as variantes de uma imagem.
+        process_stories(self, stories: List[Dict[str, Any]]) -> List[Dict[str, Any]]: Adiciona as variantes às histórias.
+    """
+
+    def __init__(self, variants: Optional[Dict[str, Dict[str, Any]]] = None, max_workers: Optional[int] = None,
+                 blob_store: Optional[BlobStore] = None):
+        """
+        :param variants: As especificações das variantes, no formato de DEFAULT_VARIANTS (padrão: DEFAULT_VARIANTS).
+        :param max_workers: Número de processos do pool (padrão: número de CPUs).
+        :param blob_store: Armazenamento opcional; quando informado, as imagens são lidas das referências do campo 'img'
+            e as variantes são gravadas nele e devolvidas como referências, em vez de base64.
+        :raises ImportError: Se a biblioteca Pillow não estiver instalada.
+        """
+        if not PILLOW_AVAILABLE:
+            raise ImportError("A biblioteca Pillow é necessária para gerar as variantes das imagens (pip install Pillow).")
+        self.variants = variants if variants is not None else DEFAULT_VARIANTS
+        self.max_workers = max_workers
+        self.blob_store = blob_store
+
+    def _load_image(self, img: Any) -> bytes:
+        """
+        :param img: O valor do campo 'img': referência do BlobStore ou string base64.
+        :return: Os bytes da imagem.
+        :raises ValueError: Se img for uma referência e o processador não tiver um BlobStore.
+        """
+        if isinstance(img, dict):
+            if self.blob_store is None:
+                raise ValueError(f"A imagem {img.get('hash')} é uma referência de blob, mas nenhum BlobStore foi informado.")
+            return self.blob_store.get(img)
+        return base64.b64decode(img)
+
+    def _to_variant_entry(self, name: str, rendered: Tuple[bytes, int, int]) -> Dict[str, Any]:
+        """
+        :param name: O nome da variante.
+        :param rendered: Os bytes, a largura e a altura da variante.
+        :return: A referência do blob (ou o base64) da variante, com suas dimensões.
+        """
+        data, width, height = rendered
+        mime = _MIME_TYPES.get(self.variants[name]["format"].upper(), "application/octet-stream")
+        if self.blob_store is not None:
+            entry = self.blob_store.put(data, mime)
+        else:
+            entry = {"mime": mime, "size": len(data), "base64": base64.b64encode(data).decode('utf-8')}
+        entry.update(width=width, height=height)
+        return entry
+
+    def _collect(self, step: Callable[[], Any]) -> Tuple[Any, Optional[str]]:
+        """
+        :param step: Função que carrega ou renderiza as variantes de uma imagem.
+        :return: O resultado e None, ou None e a mensagem de erro.
+        """
+        try:
+            return step(), None
+        except Exception as e:
+            print(f"Erro ao gerar as variantes da imagem: {e}")
+            return None, str(e)
+
+    def process(self, image_bytes: bytes) -> Dict[str, Dict[str, Any]]:
+        """
+        Gera as variantes de uma única imagem no processo atual.
+        
+        :param image_bytes: Os bytes da imagem original.
+        :return: Dicionário {nome da variante: entrada da variante}.
+        """
+        rendered = _render_variants(image_bytes, self.variants)
+        return {name: self._to_variant_entry(name, variant) for name, variant in rendered.items()}
+
+    def process_stories(self, stories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Gera as variantes das imagens de todas as histórias em paralelo e as adiciona no campo 'img_variants',
+        mantendo a imagem original em 'img'. Imagens que não puderem ser carregadas ou processadas ficam com
+        'img_variants' igual a None e a mensagem de erro em 'img_variants_error', sem interromper as demais.
+        
+        :param stories: As histórias com o campo 'img'.
+        :return: Novas histórias, na mesma ordem, com o campo 'img_variants'.
+        """
+        loaded = [self._collect(lambda story=story: self._load_image(story['img'])) for story in stories]
+        if sum(1 for image, _ in loaded if image is not None) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(_render_variants, image, self.variants) if image is not None else None
+                           for image, _ in loaded]
+                outcomes = [self._collect(future.result) if future is not None else (None, error)
+                            for future, (_, error) in zip(futures, loaded)]
+        else:
+            outcomes = [self._collect(lambda image=image: _render_variants(image, self.variants)) if image is not None else (None, error)
+                        for image, error in loaded]
+
+        results = []
+        for story, (rendered, error) in zip(stories, outcomes):
+            if rendered is None:
+                results.append(dict(story, img_variants=None, img_variants_error=error))
+                continue
+            variants = {name: self._to_variant_entry(name, variant) for name, variant in rendered.items()}
+            results.append(dict(story, img_variants=variants))
+        return results
@@ -0,0 +1,123 @@
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Optional, Tuple
+from langdetect import detector_factory, LangDetectException
+
+# O langdetect mantém uma fábrica global (carregada sob demanda) que não é thread-safe;
+# todas as chamadas de detecção do processo devem ser feitas com este lock.
+LANGDETECT_LOCK = threading.Lock()
+
+
+class SampledLanguageDetector:
+    """
+    Classe responsável por detectar o idioma de um documento com custo constante: em vez de
+    analisar o texto inteiro, classifica N janelas de tamanho fixo espalhadas pelas páginas e
+    escolhe o idioma por maioria de votos. Cada janela é classificada por um detector próprio, semeado
+    com a semente da instância, para que o resultado seja determinístico sem alterar a semente global
+    do langdetect usada por outros chamadores. A resposta é mantida em cache por hash do documento.
+    
+    Métodos:
+        __init__(self, num_samples: int, window_size: int, min_confidence: float, seed: int, cache_size: int): Inicializa o detector.
+        sample_windows(self, pages: List[str]) -> List[str]: Seleciona as janelas de texto espalhadas pelas páginas.
+        vote(self, pages: List[str]) -> Tuple[str, float]: Classifica as janelas e retorna o idioma vencedor e sua proporção de votos.
+        detect(self, pages: List[str], document_hash: Optional[str]) -> str: Retorna o código do idioma do documento.
+    """
+
+    def __init__(self, num_samples: int = 8, window_size: int = 500, min_confidence: float = 0.5,
+                 seed: int = 0, cache_size: int = 1024):
+        """
+        :param num_samples: Número de janelas classificadas (padrão: 8).
+        :param window_size: Tamanho de cada janela em caracteres (padrão: 500).
+        :param min_confidence: Proporção mínima de votos do idioma vencedor (padrão: 0.5).
+        :param seed: Semente do langdetect, que é aleatório por padrão (padrão: 0).
+        :param cache_size: Quantidade máxima de documentos mantidos no cache (padrão: 1024).
+        """
+        self.num_samples = num_samples
+        self.window_size = window_size
+        self.min_confidence = min_confidence
+        self.seed = seed
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sample_windows(self, pages: List[str]) -> List[str]:
+        """
+        Seleciona até num_samples janelas, uma por página, em páginas espalhadas uniformemente
+        pelo documento. Cada janela é retirada do meio da página, evitando cabeçalhos e rodapés.
+        
+        :param pages: O texto de cada página.
+        :return: Lista de janelas de texto.
+        """
+        non_empty = [page for page in pages if page.strip()]
+        if not non_empty:
+            return []
+        count = min(self.num_samples, len(non_empty))
+        windows = []
+        for i in range(count):
+            page = non_empty[i * len(non_empty) // count]
+            start = max((len(page) - self.window_size) // 2, 0)
+            windows.append(page[start:start + self.window_size])
+        return windows
+
+    def vote(self, pages: List[str]) -> Tuple[str, float]:
+        """
+        Classifica cada janela separadamente (a votação precisa de um idioma por janela) e escolhe o idioma
+        por maioria de votos.
+        
+        :param pages: O texto de cada página.
+        :return: Tupla (código do idioma vencedor, proporção de votos).
+        :raises ValueError: Se nenhuma janela puder ser classificada.
+        """
+        votes = Counter()
+        with LANGDETECT_LOCK:
+            for window in self.sample_windows(pages):
+                try:
+                    votes[self._detect_window(window)] += 1
+                except LangDetectException:
+                    continue
+        if not votes:
+            raise ValueError("Não foi possível detectar o idioma do texto. O conteúdo pode estar vazio ou insuficiente.")
+        language_code, count = votes.most_common(1)[0]
+        return language_code, count / sum(votes.values())
+
+    def _detect_window(self, window: str) -> str:
+        """
+        Classifica uma janela com um detector criado a partir da fábrica compartilhada do langdetect e
+        semeado apenas localmente. Deve ser chamado com LANGDETECT_LOCK.
+        
+        :param window: A janela de texto.
+        :return: O código do idioma da janela.
+        :raises LangDetectException: Se a janela não puder ser classificada.
+        """
+        detector_factory.init_factory()
+        detector = detector_factory._factory.create()
+        detector.seed = self.seed
+        detector.random.seed(self.seed)
+        detector.append(window)
+        return detector.detect()
+
+    def detect(self, pages: List[str], document_hash: Optional[str] = None) -> str:
+        """
+        Retorna o código do idioma do documento, consultando o cache quando o hash é informado.
+        
+        :param pages: O texto de cada página.
+        :param document_hash: Hash do documento usado como chave do cache.
+        :return: O código do idioma (por exemplo, 'pt').
+        :raises ValueError: Se o idioma não puder ser detectado ou a confiança ficar abaixo do mínimo.
+        """
+        if document_hash is not None:
+            with self._lock:
+                if document_hash in self._cache:
+                    self._cache.move_to_end(document_hash)
+                    return self._cache[document_hash]
+
+        language_code, confidence = self.vote(pages)
+        if confidence < self.min_confidence:
+            raise ValueError(f"Idioma detectado com confiança insuficiente: {language_code} ({confidence:.0%} dos votos).")
+
+        if document_hash is not None:
+            with self._lock:
+                self._cache[document_hash] = language_code
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return language_code
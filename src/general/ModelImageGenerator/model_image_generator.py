@@ -1,41 +1,81 @@
 import base64
-import boto3
+import hashlib
 import json
-import os
 import random
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from src.general.AWSClient.client_registry import get_client, classify_bedrock_error
+from src.general.Resilience.resilience import get_resilient_caller
+from src.general.BlobStore.blob_store import BlobStore
+from src.general.Cache.image_cache import ImageCache
+from src.general.Concurrency.provider_limiter import provider_limiter
 
 class StableDiffusionImageGenerator:
     """
     Classe responsável por gerar imagens utilizando o modelo Stable Diffusion através do serviço AWS Bedrock Runtime.
     
     Atributos:
-        client (boto3.Client): Cliente para interagir com o serviço AWS Bedrock Runtime.
+        client (boto3.Client): Cliente compartilhado para interagir com o serviço AWS Bedrock Runtime.
+        resilience (ResilientCaller): Controle de taxa, retries e circuit breaker compartilhado do provedor.
+        cache (ImageCache): Cache opcional das imagens geradas com semente determinística.
     
     Métodos:
-        __init__(self): Inicializa o cliente AWS Bedrock Runtime.
-        generate_image(prompt: str, style_preset: str, cfg_scale: int, steps: int): Gera uma imagem com base no prompt fornecido.
+        __init__(self, region_name: str, deterministic_seed: bool, cache: Optional[ImageCache]): Inicializa o cliente AWS Bedrock Runtime.
+        prompt_seed(prompt: str) -> int: Deriva uma semente determinística do hash do prompt.
+        generate_image(prompt: str, style_preset: str, cfg_scale: int, steps: int, seed: Optional[int]): Gera uma imagem com base no prompt fornecido.
+        agenerate_image(prompt: str, style_preset: str, cfg_scale: int, steps: int, seed: Optional[int]): Versão assíncrona de generate_image.
         save_image(base64_image_data: str, output_dir: str) -> str: Salva a imagem gerada em um diretório local.
     """
     
-    def __init__(self, region_name: str = "us-east-1"):
+    def __init__(self, region_name: str = "us-east-1", deterministic_seed: bool = False, cache: Optional[ImageCache] = None):
         """
-        Inicializa o gerador de imagens Stable Diffusion com a configuração da região AWS.
+        Inicializa o gerador de imagens Stable Diffusion com o cliente compartilhado da região AWS.
+
+        :param region_name: A região AWS (padrão: "us-east-1").
+        :param deterministic_seed: Se True, a semente padrão é derivada do hash do prompt em vez de sorteada (padrão: False).
+        :param cache: Cache opcional das imagens; só é usado quando a semente é determinística.
         """
-        self.client = boto3.client("bedrock-runtime", region_name=region_name)
+        self.client = get_client("bedrock-runtime", region_name)
         self.model_id = "stability.stable-diffusion-xl-v1"
+        self.resilience = get_resilient_caller("bedrock-stable-diffusion", classify_bedrock_error)
+        self.deterministic_seed = deterministic_seed
+        self.cache = cache
+
+    @staticmethod
+    def prompt_seed(prompt: str) -> int:
+        """
+        Deriva uma semente determinística, no intervalo aceito pelo modelo, a partir do SHA-256 do prompt.
+
+        :param prompt: Descrição da imagem.
+        :return: A semente (entre 0 e 4294967295).
+        """
+        return int.from_bytes(hashlib.sha256(prompt.encode('utf-8')).digest()[:4], "big")
     
-    def generate_image(self, prompt: str, style_preset: str = "photographic", cfg_scale: int = 10, steps: int = 30) -> Dict[str, Any]:
+    def generate_image(self, prompt: str, style_preset: str = "photographic", cfg_scale: int = 10, steps: int = 30,
+                       seed: Optional[int] = None) -> Dict[str, Any]:
         """
         Gera uma imagem com base no prompt fornecido utilizando o modelo Stable Diffusion.
+        Com uma semente determinística (informada ou derivada do prompt), o resultado é consultado
+        e armazenado no cache de imagens, se houver.
 
         :param prompt: Descrição da imagem que deseja gerar.
         :param style_preset: O estilo da imagem (e.g., 'photographic').
         :param cfg_scale: Escala de orientação de configuração.
         :param steps: Número de passos para a geração da imagem.
+        :param seed: Semente da geração (padrão: derivada do prompt, se deterministic_seed, ou sorteada).
         :return: Dicionário contendo a imagem gerada em base64.
         """
-        seed = random.randint(0, 4294967295)
+        if seed is None and self.deterministic_seed:
+            seed = self.prompt_seed(prompt)
+
+        cache_key = None
+        if seed is not None and self.cache is not None:
+            cache_key = ImageCache.make_key(self.model_id, prompt, style_preset, cfg_scale, steps, seed)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return base64.b64encode(cached).decode('utf-8')
+
+        if seed is None:
+            seed = random.randint(0, 4294967295)
 
         native_request = {
             "text_prompts": [{"text": prompt}],
@@ -47,35 +87,44 @@ class StableDiffusionImageGenerator:
 
         request = json.dumps(native_request)
 
-        response = self.client.invoke_model(modelId=self.model_id, body=request)
+        response = self.resilience.call(self.client.invoke_model, modelId=self.model_id, body=request)
 
         model_response = json.loads(response["body"].read())
 
-        return model_response["artifacts"][0]["base64"]
+        base64_image = model_response["artifacts"][0]["base64"]
+        if cache_key is not None:
+            self.cache.put(cache_key, base64.b64decode(base64_image))
+        return base64_image
+
+    async def agenerate_image(self, prompt: str, style_preset: str = "photographic", cfg_scale: int = 10, steps: int = 30,
+                              seed: Optional[int] = None) -> str:
+        """
+        Versão assíncrona de generate_image: a chamada bloqueante roda no executor compartilhado,
+        respeitando o limite de chamadas simultâneas do provedor "bedrock-stable-diffusion".
+
+        :param prompt: Descrição da imagem que deseja gerar.
+        :param style_preset: O estilo da imagem (e.g., 'photographic').
+        :param cfg_scale: Escala de orientação de configuração.
+        :param steps: Número de passos para a geração da imagem.
+        :param seed: Semente da geração (padrão: derivada do prompt, se deterministic_seed, ou sorteada).
+        :return: A imagem gerada em base64.
+        """
+        return await provider_limiter.run(
+            "bedrock-stable-diffusion", self.generate_image, prompt, style_preset=style_preset, cfg_scale=cfg_scale,
+            steps=steps, seed=seed
+        )
     
     def save_image(self, base64_image_data: str, output_dir: str = "output") -> str:
         """
-        Salva a imagem gerada em um diretório local.
+        Salva a imagem gerada em um diretório local, com o SHA-256 dos bytes como nome (BlobStore):
+        salvar a mesma imagem novamente não cria um novo arquivo.
 
         :param base64_image_data: Dados da imagem em base64.
         :param output_dir: Diretório para salvar a imagem.
         :return: Caminho para o arquivo salvo.
         """
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        i = 1
-        while os.path.exists(os.path.join(output_dir, f"stability_{i}.png")):
-            i += 1
-
-        image_data = base64.b64decode(base64_image_data)
-
-        image_path = os.path.join(output_dir, f"stability_{i}.png")
-        with open(image_path, "wb") as file:
-            file.write(image_data)
+        blob_store = BlobStore(output_dir)
+        image_path = blob_store.path(blob_store.put_base64(base64_image_data, "image/png"))
 
         print(f"The generated image has been saved to {image_path}")
         return image_path
-
-
-
@@ -1,8 +1,13 @@
 
 import json
 import logging
+import time
 from botocore.exceptions import ClientError
-import boto3
+from src.general.AWSClient.client_registry import get_client, classify_bedrock_error
+from src.general.Resilience.resilience import get_resilient_caller
+from src.general.Concurrency.provider_limiter import provider_limiter
+from src.general.Cache.llm_cache import LLMResponseCache
+from src.general.TokenCounter.token_counter import CLAUDE3_CONTEXT_TOKENS, TokenUsageTracker, token_usage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,31 +21,140 @@ class Claude3SonnetInvoker:
     making it simpler to interact with artificial intelligence models hosted in the cloud.
 
     Attributes:
-        boto3_bedrock (boto3.Client): Client for interacting with the AWS Bedrock Runtime service.
+        boto3_bedrock (boto3.Client): Shared client for interacting with the AWS Bedrock Runtime service.
+        cache (LLMResponseCache): Optional response cache consulted before each call.
+        resilience (ResilientCaller): Process-wide retry, rate-control and circuit-breaking engine for Claude calls.
+        usage_tracker (TokenUsageTracker): Per-stage accounting of the input and output tokens reported by Bedrock.
+        context_window (int): Context window of the model, in tokens.
     
     Methods:
-        __init__(self): Builder that initializes the AWS Bedrock Runtime client.
-        invoke_claude(self, prompt): Method to invoke the model with a specific prompt and get the response.
+        __init__(self, region_name, cache, usage_tracker): Builder that fetches the shared AWS Bedrock Runtime client.
+        invoke_claude(self, prompt, max_tokens, stage): Method to invoke the model with a specific prompt and get the response.
+        invoke_claude_stream(self, prompt, max_tokens, stage): Generator that yields the answer text as the model produces it.
+        ainvoke_claude(self, prompt, max_tokens, stage): Awaitable counterpart of invoke_claude, limited per provider.
     """
     
-    def __init__(self):
+    def __init__(self, region_name=None, cache=None, usage_tracker: TokenUsageTracker = None):
         """
-        Launches the Claude 3 sonnet invoker, configuring the AWS Bedrock Runtime client.
+        Launches the Claude 3 sonnet invoker, reusing the process-wide AWS Bedrock Runtime client
+        (and its connection pool) from the client registry.
+
+        :param region_name: The AWS region (default: the region configured in the environment).
+        :param cache: Optional LLMResponseCache; identical (model, max_tokens, prompt) calls are served from it.
+        :param usage_tracker: Where token usage is recorded (default: the process-wide token_usage).
         """
-        self.boto3_bedrock = boto3.client(service_name="bedrock-runtime")
+        self.boto3_bedrock = get_client("bedrock-runtime", region_name)
+        self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+        self.cache = cache
+        self.usage_tracker = usage_tracker if usage_tracker is not None else token_usage
+        self.context_window = CLAUDE3_CONTEXT_TOKENS
+        self.resilience = get_resilient_caller("bedrock-claude", classify_bedrock_error)
     
-    def invoke_claude(self, prompt):
+    def invoke_claude(self, prompt, max_tokens=4096, stage="default"):
         """
         Invokes the Anthropic Claude 3 sonnet model to perform an inference
-        using the prompt provided in the request body.
+        using the prompt provided in the request body. The usage block of the response
+        (input and output tokens) and the call latency are recorded under the given stage.
 
         :param prompt: The prompt you want Claude to complete.
+        :param max_tokens: The maximum number of tokens in the answer; callers should pass the expected output size (default: 4096).
+        :param stage: Pipeline stage the call is accounted to (default: "default").
         :return: The model inference answer.
+        :Raises: ClientError: If an error occurs while invoking the model (after throttling and transient errors
+            have been retried), or CircuitOpenError if Bedrock has been failing consistently.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = LLMResponseCache.make_key(self.model_id, max_tokens, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.usage_tracker.record(stage, cached=True)
+                return cached
+
+        body = self._build_body(prompt, max_tokens)
+
+        modelId = self.model_id
+        accept = "application/json"
+        contentType = "application/json"
+
+        started = time.perf_counter()
+        response = self.resilience.call(
+            self.boto3_bedrock.invoke_model, body=body, modelId=modelId, accept=accept, contentType=contentType
+        )
+        response_body = json.loads(response.get("body").read())
+
+        results = response_body.get("content")[0].get("text")
+
+        usage = response_body.get("usage") or {}
+        self.usage_tracker.record(
+            stage, usage.get("input_tokens", 0), usage.get("output_tokens", 0), time.perf_counter() - started
+        )
+
+        if cache_key is not None:
+            self.cache.put(cache_key, results)
+        return results
+
+    def invoke_claude_stream(self, prompt, max_tokens=4096, stage="default"):
+        """
+        Invokes the model through Bedrock's response-stream API and yields each text delta as soon
+        as it arrives, so callers can act on the beginning of the answer before it is complete.
+        Cached answers are yielded at once; a fully received answer is stored in the cache.
+        Token usage is read from the message_start and message_delta events.
+
+        :param prompt: The prompt you want Claude to complete.
+        :param max_tokens: The maximum number of tokens in the answer (default: 4096).
+        :param stage: Pipeline stage the call is accounted to (default: "default").
+        :return: Generator of answer text fragments.
         :Raises: ClientError: If an error occurs while invoking the model.
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = LLMResponseCache.make_key(self.model_id, max_tokens, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.usage_tracker.record(stage, cached=True)
+                yield cached
+                return
+
+        started = time.perf_counter()
+        # Only opening the stream is retried; a failure mid-stream propagates to the caller
+        response = self.resilience.call(
+            self.boto3_bedrock.invoke_model_with_response_stream, body=self._build_body(prompt, max_tokens), modelId=self.model_id,
+            accept="application/json", contentType="application/json"
+        )
+
+        fragments = []
+        input_tokens = output_tokens = 0
+        for event in response.get("body"):
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            data = json.loads(chunk.get("bytes"))
+            if data.get("type") == "content_block_delta":
+                text = data["delta"].get("text", "")
+                fragments.append(text)
+                yield text
+            elif data.get("type") == "message_start":
+                input_tokens = data["message"].get("usage", {}).get("input_tokens", 0)
+            elif data.get("type") == "message_delta":
+                output_tokens = data.get("usage", {}).get("output_tokens", output_tokens)
+
+        self.usage_tracker.record(stage, input_tokens, output_tokens, time.perf_counter() - started)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, "".join(fragments))
+
+    def _build_body(self, prompt, max_tokens):
+        """
+        Builds the JSON request body of the Messages API for a single user prompt.
+
+        :param prompt: The prompt you want Claude to complete.
+        :param max_tokens: The maximum number of tokens in the answer.
+        :return: The serialized request body.
+        """
         prompt_config = {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4096,
+            "max_tokens": max_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -50,17 +164,16 @@ class Claude3SonnetInvoker:
                 }
             ],
         }
+        return json.dumps(prompt_config)
 
-        body = json.dumps(prompt_config)
-
-        modelId = "anthropic.claude-3-sonnet-20240229-v1:0"
-        accept = "application/json"
-        contentType = "application/json"
-
-        response = self.boto3_bedrock.invoke_model(
-            body=body, modelId=modelId, accept=accept, contentType=contentType
-        )
-        response_body = json.loads(response.get("body").read())
+    async def ainvoke_claude(self, prompt, max_tokens=4096, stage="default"):
+        """
+        Awaitable counterpart of invoke_claude. The blocking boto3 call runs on the shared provider
+        executor, and at most the "bedrock-claude" limit of calls run concurrently.
 
-        results = response_body.get("content")[0].get("text")
-        return results
\ No newline at end of file
+        :param prompt: The prompt you want Claude to complete.
+        :param max_tokens: The maximum number of tokens in the answer (default: 4096).
+        :param stage: Pipeline stage the call is accounted to (default: "default").
+        :return: The model inference answer.
+        """
+        return await provider_limiter.run("bedrock-claude", self.invoke_claude, prompt, max_tokens=max_tokens, stage=stage)
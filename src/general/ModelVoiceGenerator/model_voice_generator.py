@@ -1,83 +1,408 @@
 import base64
+import hashlib
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
 from elevenlabs.client import ElevenLabs
 from elevenlabs import Voice, VoiceSettings
-import time
 import httpx
+from src.general.Concurrency.provider_limiter import provider_limiter, DEFAULT_PROVIDER_LIMITS
+from src.general.Resilience.resilience import THROTTLE, RETRY, FAIL, get_resilient_caller
+from src.general.AudioStream.audio_stream import IncrementalBase64Encoder, sink_writer
+from src.general.Cache.tts_cache import TTSCache
+
+# Ajustes padrão da síntese, compartilhados pelas chamadas à API e pelas chaves do cache de áudios
+DEFAULT_STABILITY = 0.75
+DEFAULT_SIMILARITY_BOOST = 0.75
+DEFAULT_RETRIES = 3
+
+
+def classify_elevenlabs_error(error: Exception) -> str:
+    """
+    Classifica um erro de chamada à ElevenLabs para o ResilientCaller: HTTP 429 é throttling,
+    timeouts, erros de rede e HTTP 5xx são transitórios e o restante é definitivo.
+    
+    :param error: O erro lançado pelo cliente ElevenLabs.
+    :return: THROTTLE, RETRY ou FAIL.
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429:
+        return THROTTLE
+    if isinstance(status_code, int) and status_code >= 500:
+        return RETRY
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError)):
+        return RETRY
+    return FAIL
+
+
+class VoiceCatalog:
+    """
+    Catálogo das vozes da conta ElevenLabs, que resolve o nome de uma voz para o seu voice_id.
+    A lista de vozes é obtida apenas quando um nome não está no catálogo ou quando o catálogo expira (TTL),
+    evitando uma chamada à API antes de cada síntese.
+    
+    Métodos:
+        __init__(self, client: ElevenLabs, ttl_seconds: float): Inicializa o catálogo vazio.
+        resolve(self, voice_name: str) -> str: Retorna o voice_id da voz.
+        refresh(self): Recarrega a lista de vozes da API.
+    """
+
+    def __init__(self, client: ElevenLabs, ttl_seconds: float = 3600):
+        """
+        :param client: O cliente ElevenLabs.
+        :param ttl_seconds: Tempo de vida do catálogo em segundos (padrão: 1 hora).
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self._voice_ids: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Recarrega a lista de vozes da API"""
+        voices = self.client.voices.get_all().voices
+        with self._lock:
+            self._voice_ids = {voice.name: voice.voice_id for voice in voices}
+            self._loaded_at = time.monotonic()
+
+    def resolve(self, voice_name: str) -> str:
+        """
+        Retorna o voice_id da voz, recarregando o catálogo se o nome não for encontrado ou se ele tiver expirado.
+        
+        :param voice_name: O nome da voz.
+        :return: O voice_id da voz.
+        :raises ValueError: Se a voz não existir na conta.
+        """
+        with self._lock:
+            expired = time.monotonic() - self._loaded_at > self.ttl_seconds
+            voice_id = None if expired else self._voice_ids.get(voice_name)
+        if voice_id is not None:
+            return voice_id
+
+        self.refresh()
+        with self._lock:
+            voice_id = self._voice_ids.get(voice_name)
+        if voice_id is None:
+            raise ValueError(f"Voz '{voice_name}' não encontrada nas vozes disponíveis.")
+        return voice_id
+
+
+_voice_catalogs: Dict[str, VoiceCatalog] = {}
+_voice_catalogs_lock = threading.Lock()
+
+
+def get_voice_catalog(api_key: str, client: ElevenLabs) -> VoiceCatalog:
+    """
+    Retorna o catálogo de vozes compartilhado pelo processo para a chave de API, criando-o na primeira chamada.
+    
+    :param api_key: A chave de API da ElevenLabs.
+    :param client: O cliente usado para carregar o catálogo.
+    :return: O catálogo de vozes.
+    """
+    with _voice_catalogs_lock:
+        if api_key not in _voice_catalogs:
+            _voice_catalogs[api_key] = VoiceCatalog(client)
+        return _voice_catalogs[api_key]
+
+
+_key_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_key_semaphores_lock = threading.Lock()
+
+
+def get_key_semaphore(api_key: str, max_concurrent_requests: int) -> threading.BoundedSemaphore:
+    """
+    Retorna o semáforo compartilhado pelo processo que limita as sínteses simultâneas de uma chave de API.
+    O limite é definido pelo primeiro gerador criado para a chave.
+    
+    :param api_key: A chave de API da ElevenLabs.
+    :param max_concurrent_requests: Número máximo de sínteses simultâneas da chave.
+    :return: O semáforo da chave.
+    """
+    with _key_semaphores_lock:
+        if api_key not in _key_semaphores:
+            _key_semaphores[api_key] = threading.BoundedSemaphore(max_concurrent_requests)
+        return _key_semaphores[api_key]
+
 
 class VoiceGenerator:
     """
     Classe responsável por gerar áudio a partir de texto utilizando a API ElevenLabs e adicioná-lo à estrutura recebida em base64.
     
     Métodos:
-        __init__(self, api_key: str, model: str = "eleven_multilingual_v2", timeout: int = 60): 
-        Inicializa a classe com a API Key e o modelo de voz, com timeout configurável.
-        generate_audio(self, text: str, voice_name: str = "Brian"): Gera o áudio a partir de um texto usando a voz especificada.
+        __init__(self, api_key: str, model: str = "eleven_multilingual_v2", timeout: int = 60, max_concurrent_requests: int = 2, cache: Optional[TTSCache] = None): 
+        Inicializa a classe com a API Key e o modelo de voz, com timeout, limite de sínteses simultâneas e cache de áudios configuráveis.
+        generate_audio(self, text: str, voice_name: str = "Brian", voice_id: Optional[str] = None): Gera o áudio a partir de um texto usando a voz especificada.
+        agenerate_audio(self, text: str, voice_name: str = "Brian", voice_id: Optional[str] = None): Versão assíncrona de generate_audio.
+        iter_audio(self, text: str, ...) -> Iterator[bytes]: Produz os pedaços do áudio à medida que chegam da API.
+        stream_audio(self, text: str, sink, ...) -> Dict[str, Any]: Escreve o áudio em um arquivo, socket ou função à medida que chega.
+        stream_audio_to_file(self, text: str, filename: str, ...) -> Dict[str, Any]: Escreve o áudio em um arquivo à medida que chega.
+        iter_audio_base64(self, text: str, ...) -> Iterator[str]: Produz o áudio em base64, codificado incrementalmente.
         save_audio_as_base64(self, audio): Converte o áudio em base64 e retorna a string.
-        process_story_structure(self, stories: list): Processa a estrutura de histórias e adiciona o áudio gerado em base64.
+        process_story_structure(self, stories: list, voice_name: str, max_concurrency: Optional[int], audio_dir: Optional[str]): Processa a estrutura de histórias e adiciona o áudio gerado em base64.
         save_structure_to_json(self, updated_stories: list, filename: str): Salva a estrutura atualizada em um arquivo JSON.
     """
     
-    def __init__(self, api_key: str, model: str = "eleven_multilingual_v2", timeout: int = 60):
+    def __init__(self, api_key: str, model: str = "eleven_multilingual_v2", timeout: int = 60,
+                 max_concurrent_requests: int = DEFAULT_PROVIDER_LIMITS["elevenlabs"], cache: Optional[TTSCache] = None):
         """
         Inicializa o gerador de voz com a API Key, o modelo de voz e define o timeout para requisições.
         
         :param api_key: Chave de API da ElevenLabs.
         :param model: O modelo de voz a ser utilizado (padrão: "eleven_multilingual_v2").
         :param timeout: Tempo limite em segundos para as requisições à API (padrão: 60 segundos).
+        :param max_concurrent_requests: Número máximo de sínteses simultâneas por chave de API, respeitado
+            por todos os geradores do processo que usam a mesma chave (padrão: o limite do provedor "elevenlabs").
+        :param cache: Cache opcional dos áudios sintetizados; quando informado, um texto já sintetizado com a mesma
+            voz, modelo e ajustes é reaproveitado em vez de enviado novamente à API.
         """
         self.client = ElevenLabs(api_key=api_key, timeout=timeout)
         self.model = model
         self.timeout = timeout
+        self.resilience = get_resilient_caller("elevenlabs", classify_elevenlabs_error)
+        self.voice_catalog = get_voice_catalog(api_key, self.client)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.key_semaphore = get_key_semaphore(api_key, max_concurrent_requests)
+        self.cache = cache
 
-    def generate_audio(self, text: str, voice_name: str = "Brian", stability: float = 0.75, similarity_boost: float = 0.75, retries: int = 3):
+    def generate_audio(self, text: str, voice_name: str = "Brian", stability: float = DEFAULT_STABILITY,
+                       similarity_boost: float = DEFAULT_SIMILARITY_BOOST, retries: int = DEFAULT_RETRIES,
+                       voice_id: Optional[str] = None):
         """
         Gera o áudio a partir de um texto, usando o nome da voz especificada e os ajustes de voz (stability, similarity).
-        Implementa uma política de retries em caso de falha na conexão.
+        O nome é resolvido para o voice_id pelo catálogo de vozes compartilhado; informar voice_id dispensa a consulta.
+        As chamadas passam pelo ResilientCaller do provedor "elevenlabs": throttling (HTTP 429), timeouts e
+        erros transitórios são repetidos com backoff exponencial e jitter, e a taxa de chamadas se adapta ao throttling.
 
         :param text: Texto a ser convertido em áudio.
         :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
-        :param stability: Estabilidade da voz (padrão: 0.75).
-        :param similarity_boost: Nível de boost de similaridade da voz (padrão: 0.75).
-        :param retries: Número de tentativas em caso de erro de conexão (padrão: 3).
-        :return: O áudio gerado pela API em bytes.
+        :param stability: Estabilidade da voz (padrão: DEFAULT_STABILITY).
+        :param similarity_boost: Nível de boost de similaridade da voz (padrão: DEFAULT_SIMILARITY_BOOST).
+        :param retries: Número máximo de tentativas (padrão: DEFAULT_RETRIES).
+        :param voice_id: O id da voz; quando informado, voice_name é ignorado (padrão: resolvido a partir de voice_name).
+        :return: O áudio gerado pela API (ou reaproveitado do cache) em bytes.
         """
         # Configurações de voz
         voice_settings = VoiceSettings(
             stability=stability,
             similarity_boost=similarity_boost,
         )
+
+        try:
+            cache_key = self._cache_key(text, voice_name, voice_id, stability, similarity_boost, retries)
+            if cache_key is not None:
+                cached_audio = self.cache.get(cache_key)
+                if cached_audio is not None:
+                    return cached_audio
+            audio = self.resilience.call(self._synthesize, text, voice_name, voice_id, voice_settings, max_attempts=retries)
+        except Exception as e:
+            print(f"Erro ao gerar o áudio: {e}")
+            raise Exception(f"Falha ao gerar o áudio após {retries} tentativas.") from e
+
+        if cache_key is not None:
+            self.cache.put(cache_key, audio)
+        return audio
+
+    def _cache_key(self, text: str, voice_name: str, voice_id: Optional[str], stability: float, similarity_boost: float,
+                   retries: int) -> Optional[str]:
+        """
+        Gera a chave do cache de áudios para a síntese, resolvendo o voice_id pelo catálogo quando necessário.
         
-        attempt = 0
-        while attempt < retries:
-            try:
-                # Obtém todas as vozes disponíveis e seleciona a voz pelo nome
-                voices = self.client.voices.get_all().voices
-                selected_voice = next((voice for voice in voices if voice.name == voice_name), None)
-                
-                if not selected_voice:
-                    raise ValueError(f"Voz '{voice_name}' não encontrada nas vozes disponíveis.")
-                
-                # Gera o áudio (retorna um gerador)
-                audio_generator = self.client.generate(
-                    text=text,
-                    voice=Voice(voice_id=selected_voice.voice_id, settings=voice_settings),
-                    model=self.model
-                )
-                
-                # Concatena os chunks do gerador para obter o áudio completo em bytes
-                audio_bytes = b''.join(audio_generator)
-
-                return audio_bytes
-            except httpx.ConnectTimeout:
-                attempt += 1
-                print(f"Tentativa {attempt} de {retries}: Timeout ao conectar-se. Tentando novamente em 5 segundos...")
-                time.sleep(5)
-            except Exception as e:
-                print(f"Erro ao gerar o áudio: {e}")
-                break
-        
-        raise Exception(f"Falha ao gerar o áudio após {retries} tentativas.")
+        :param text: Texto a ser convertido em áudio.
+        :param voice_name: Nome da voz a ser utilizada.
+        :param voice_id: O id da voz, se já conhecido.
+        :param stability: Estabilidade da voz.
+        :param similarity_boost: Nível de boost de similaridade da voz.
+        :param retries: Número máximo de tentativas da consulta ao catálogo.
+        :return: A chave do cache ou None, se não houver cache.
+        """
+        if self.cache is None:
+            return None
+        if voice_id is None:
+            voice_id = self.resilience.call(self.voice_catalog.resolve, voice_name, max_attempts=retries)
+        return TTSCache.make_key(self.model, voice_id, stability, similarity_boost, text)
+
+    def _synthesize(self, text: str, voice_name: str, voice_id: Optional[str], voice_settings: VoiceSettings) -> bytes:
+        """
+        Faz uma única tentativa de síntese: resolve a voz (se necessário) e gera o áudio completo.
+
+        :param text: Texto a ser convertido em áudio.
+        :param voice_name: Nome da voz a ser utilizada.
+        :param voice_id: O id da voz, ou None para resolvê-lo pelo nome.
+        :param voice_settings: As configurações de voz.
+        :return: O áudio gerado pela API em bytes.
+        """
+        if voice_id is None:
+            voice_id = self.voice_catalog.resolve(voice_name)
+
+        # Limita as sínteses simultâneas da chave de API
+        with self.key_semaphore:
+            # Gera o áudio (retorna um gerador)
+            audio_generator = self.client.generate(
+                text=text,
+                voice=Voice(voice_id=voice_id, settings=voice_settings),
+                model=self.model
+            )
+
+            # Concatena os chunks do gerador para obter o áudio completo em bytes
+            return b''.join(audio_generator)
+
+    def _open_stream(self, text: str, voice_name: str, voice_id: Optional[str], voice_settings: VoiceSettings) -> Tuple[bytes, Iterator[bytes]]:
+        """
+        Abre a síntese em streaming e aguarda o primeiro pedaço, para que falhas antes do início do áudio
+        possam ser repetidas pelo ResilientCaller. A vaga da chave de API é ocupada apenas durante a tentativa:
+        se a abertura falhar ela é liberada (e não fica presa durante o backoff); em caso de sucesso ela
+        continua ocupada e quem chamou deve liberá-la depois de consumir os pedaços.
+
+        :param text: Texto a ser convertido em áudio.
+        :param voice_name: Nome da voz a ser utilizada.
+        :param voice_id: O id da voz, ou None para resolvê-lo pelo nome.
+        :param voice_settings: As configurações de voz.
+        :return: Tupla (primeiro pedaço, iterador dos pedaços seguintes).
+        """
+        if voice_id is None:
+            voice_id = self.voice_catalog.resolve(voice_name)
+        self.key_semaphore.acquire()
+        try:
+            chunks = iter(self.client.generate(
+                text=text,
+                voice=Voice(voice_id=voice_id, settings=voice_settings),
+                model=self.model,
+                stream=True
+            ))
+            return next(chunks, b''), chunks
+        except BaseException:
+            self.key_semaphore.release()
+            raise
+
+    def iter_audio(self, text: str, voice_name: str = "Brian", stability: float = DEFAULT_STABILITY,
+                   similarity_boost: float = DEFAULT_SIMILARITY_BOOST, retries: int = DEFAULT_RETRIES,
+                   voice_id: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Produz os pedaços do áudio à medida que chegam da API, sem montar o áudio inteiro na memória.
+        Apenas a abertura da síntese (até o primeiro pedaço) é repetida em caso de falha; uma falha no meio
+        do áudio é propagada. A vaga da chave de API fica ocupada da abertura bem-sucedida (não durante o backoff)
+        até o iterador ser consumido ou fechado.
+
+        :param text: Texto a ser convertido em áudio.
+        :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
+        :param stability: Estabilidade da voz (padrão: DEFAULT_STABILITY).
+        :param similarity_boost: Nível de boost de similaridade da voz (padrão: DEFAULT_SIMILARITY_BOOST).
+        :param retries: Número máximo de tentativas (padrão: DEFAULT_RETRIES).
+        :param voice_id: O id da voz; quando informado, voice_name é ignorado (padrão: resolvido a partir de voice_name).
+        :return: Iterador com os pedaços do áudio em bytes.
+        """
+        voice_settings = VoiceSettings(
+            stability=stability,
+            similarity_boost=similarity_boost,
+        )
+        try:
+            first_chunk, chunks = self.resilience.call(
+                self._open_stream, text, voice_name, voice_id, voice_settings, max_attempts=retries
+            )
+        except Exception as e:
+            print(f"Erro ao gerar o áudio: {e}")
+            raise Exception(f"Falha ao gerar o áudio após {retries} tentativas.") from e
+        # A vaga da chave de API, ocupada por _open_stream, é liberada quando os pedaços acabam ou o iterador é fechado
+        try:
+            if first_chunk:
+                yield first_chunk
+            yield from chunks
+        finally:
+            self.key_semaphore.release()
+
+    def stream_audio(self, text: str, sink: Any, voice_name: str = "Brian", stability: float = DEFAULT_STABILITY,
+                     similarity_boost: float = DEFAULT_SIMILARITY_BOOST, retries: int = DEFAULT_RETRIES,
+                     voice_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Escreve o áudio no destino à medida que os pedaços chegam da API.
+
+        :param text: Texto a ser convertido em áudio.
+        :param sink: O destino: socket (sendall), arquivo binário (write) ou função que recebe bytes.
+            Para clientes que precisam de base64, use um Base64Sink.
+        :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
+        :param stability: Estabilidade da voz (padrão: DEFAULT_STABILITY).
+        :param similarity_boost: Nível de boost de similaridade da voz (padrão: DEFAULT_SIMILARITY_BOOST).
+        :param retries: Número máximo de tentativas (padrão: DEFAULT_RETRIES).
+        :param voice_id: O id da voz; quando informado, voice_name é ignorado.
+        :return: Dicionário com o total de bytes escritos ("bytes") e o tempo até o primeiro byte ("first_byte_seconds").
+        """
+        write = sink_writer(sink)
+        started = time.perf_counter()
+        first_byte_seconds = None
+        total = 0
+        for chunk in self.iter_audio(text, voice_name=voice_name, stability=stability, similarity_boost=similarity_boost,
+                                     retries=retries, voice_id=voice_id):
+            if first_byte_seconds is None:
+                first_byte_seconds = time.perf_counter() - started
+            write(chunk)
+            total += len(chunk)
+        return {"bytes": total, "first_byte_seconds": first_byte_seconds}
+
+    def stream_audio_to_file(self, text: str, filename: str, **voice_options) -> Dict[str, Any]:
+        """
+        Escreve o áudio em um arquivo à medida que os pedaços chegam. O áudio é gravado em um arquivo
+        temporário e renomeado ao final, para que um áudio incompleto nunca fique no caminho final.
+
+        :param text: Texto a ser convertido em áudio.
+        :param filename: O caminho do arquivo de áudio.
+        :param voice_options: Opções de stream_audio (voice_name, stability, similarity_boost, retries, voice_id).
+        :return: O resultado de stream_audio, com o caminho do arquivo em "path".
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        partial_filename = f"{filename}.part"
+        try:
+            with open(partial_filename, "wb") as file:
+                result = self.stream_audio(text, file, **voice_options)
+            os.replace(partial_filename, filename)
+        except BaseException:
+            if os.path.exists(partial_filename):
+                os.remove(partial_filename)
+            raise
+        result["path"] = filename
+        return result
+
+    def iter_audio_base64(self, text: str, **voice_options) -> Iterator[str]:
+        """
+        Produz o áudio em base64 à medida que os pedaços chegam, com codificação incremental.
+        A concatenação das partes é idêntica ao base64 do áudio inteiro.
+
+        :param text: Texto a ser convertido em áudio.
+        :param voice_options: Opções de iter_audio (voice_name, stability, similarity_boost, retries, voice_id).
+        :return: Iterador com as partes do base64.
+        """
+        encoder = IncrementalBase64Encoder()
+        for chunk in self.iter_audio(text, **voice_options):
+            encoded = encoder.feed(chunk)
+            if encoded:
+                yield encoded
+        encoded = encoder.finish()
+        if encoded:
+            yield encoded
+
+    async def agenerate_audio(self, text: str, voice_name: str = "Brian", stability: float = DEFAULT_STABILITY,
+                              similarity_boost: float = DEFAULT_SIMILARITY_BOOST, retries: int = DEFAULT_RETRIES,
+                              voice_id: Optional[str] = None):
+        """
+        Versão assíncrona de generate_audio: a chamada bloqueante roda no executor compartilhado,
+        respeitando o limite de chamadas simultâneas do provedor "elevenlabs".
+
+        :param text: Texto a ser convertido em áudio.
+        :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
+        :param stability: Estabilidade da voz (padrão: DEFAULT_STABILITY).
+        :param similarity_boost: Nível de boost de similaridade da voz (padrão: DEFAULT_SIMILARITY_BOOST).
+        :param retries: Número máximo de tentativas (padrão: DEFAULT_RETRIES).
+        :param voice_id: O id da voz; quando informado, voice_name é ignorado (padrão: resolvido a partir de voice_name).
+        :return: O áudio gerado pela API em bytes.
+        """
+        return await provider_limiter.run(
+            "elevenlabs", self.generate_audio, text, voice_name=voice_name,
+            stability=stability, similarity_boost=similarity_boost, retries=retries, voice_id=voice_id
+        )
 
     def save_audio_as_base64(self, audio: bytes) -> str:
         """
@@ -88,32 +413,90 @@ class VoiceGenerator:
         """
         return base64.b64encode(audio).decode('utf-8')
 
-    def process_story_structure(self, stories: list) -> list:
+    def process_story_structure(self, stories: list, voice_name: str = "Brian", max_concurrency: Optional[int] = None,
+                                audio_dir: Optional[str] = None) -> list:
         """
         Processa a estrutura de histórias, gerando o áudio para cada 'story' e adiciona o áudio em base64.
+        Os áudios são gerados em paralelo, com até max_concurrency sínteses simultâneas (limitadas também
+        pelo limite da chave de API), e a ordem das histórias é preservada. Uma história cujo áudio falhar
+        permanece na saída, com "audio" igual a None e a mensagem de erro em "audio_error".
+        Com cache, os textos já sintetizados não são enviados à API; a taxa de acertos fica em self.cache.stats().
         
         :param stories: Lista contendo as histórias e imagens em base64.
-        :return: Lista atualizada com o campo "audio" adicionado.
+        :param voice_name: Nome da voz a ser utilizada (padrão: "Brian").
+        :param max_concurrency: Número máximo de sínteses simultâneas (padrão: max_concurrent_requests).
+        :param audio_dir: Se informado, o áudio de cada história é escrito em streaming em um arquivo deste
+            diretório, cujo caminho vai no campo "audio_file", em vez de ser devolvido em base64 no campo "audio".
+        :return: Lista atualizada com o campo "audio" (ou "audio_file") adicionado.
         """
-        updated_stories = []
+        max_concurrency = max_concurrency if max_concurrency is not None else self.max_concurrent_requests
+        if max_concurrency > 1 and len(stories) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(stories))) as executor:
+                return list(executor.map(lambda story_data: self._process_story(story_data, voice_name, audio_dir), stories))
+        return [self._process_story(story_data, voice_name, audio_dir) for story_data in stories]
+
+    def _process_story(self, story_data: dict, voice_name: str, audio_dir: Optional[str] = None) -> dict:
+        """
+        Gera o áudio de uma história e o adiciona à estrutura, registrando o erro em caso de falha.
         
-        for story_data in stories:
-            story_text = story_data.get("story", "")
+        :param story_data: A história.
+        :param voice_name: Nome da voz a ser utilizada.
+        :param audio_dir: Diretório opcional onde o áudio é escrito em streaming.
+        :return: A história com os campos "audio" ou "audio_file" (e "audio_error", em caso de falha).
+        """
+        story_text = story_data.get("story", "")
+        if audio_dir is not None:
+            audio_name = hashlib.sha256(f"{self.model}:{voice_name}:{story_text}".encode('utf-8')).hexdigest()[:32]
             try:
-                # Gera o áudio para a história
-                generated_audio = self.generate_audio(text=story_text, voice_name="Brian")
-                
-                # Converte o áudio gerado em base64
-                audio_base64 = self.save_audio_as_base64(generated_audio)
-                
-                # Adiciona o campo "audio" na estrutura
-                story_data["audio"] = audio_base64
-                updated_stories.append(story_data)
-                
+                story_data["audio_file"] = self._write_story_audio(story_text, voice_name, os.path.join(audio_dir, f"{audio_name}.mp3"))
             except Exception as e:
                 print(f"Erro ao gerar o áudio para a história: {e}")
+                story_data["audio_file"] = None
+                story_data["audio_error"] = str(e)
+            return story_data
+
+        try:
+            # Gera o áudio para a história (ou o reaproveita do cache)
+            generated_audio = self.generate_audio(text=story_text, voice_name=voice_name)
+            
+            # Converte o áudio gerado em base64 e adiciona o campo "audio" na estrutura
+            story_data["audio"] = self.save_audio_as_base64(generated_audio)
+            
+        except Exception as e:
+            print(f"Erro ao gerar o áudio para a história: {e}")
+            story_data["audio"] = None
+            story_data["audio_error"] = str(e)
+        
+        return story_data
+
+    def _write_story_audio(self, story_text: str, voice_name: str, path: str) -> str:
+        """
+        Escreve o áudio de uma história no arquivo indicado: a partir do cache, quando disponível, ou em
+        streaming da API, armazenando o resultado no cache. A chave e a síntese usam os mesmos ajustes.
         
-        return updated_stories
+        :param story_text: O texto da história.
+        :param voice_name: Nome da voz a ser utilizada.
+        :param path: O caminho do arquivo de áudio.
+        :return: O caminho do arquivo escrito.
+        """
+        voice_options = {"voice_name": voice_name, "stability": DEFAULT_STABILITY,
+                         "similarity_boost": DEFAULT_SIMILARITY_BOOST, "retries": DEFAULT_RETRIES}
+        cache_key = self._cache_key(story_text, voice_name, None, voice_options["stability"],
+                                    voice_options["similarity_boost"], voice_options["retries"])
+        cached_audio = self.cache.get(cache_key) if cache_key is not None else None
+        if cached_audio is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            partial_path = f"{path}.part"
+            with open(partial_path, "wb") as f:
+                f.write(cached_audio)
+            os.replace(partial_path, path)
+            return path
+
+        self.stream_audio_to_file(story_text, path, **voice_options)
+        if cache_key is not None:
+            with open(path, "rb") as f:
+                self.cache.put(cache_key, f.read())
+        return path
 
     def save_structure_to_json(self, updated_stories: list, filename: str):
         """
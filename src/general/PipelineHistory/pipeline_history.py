@@ -1,104 +1,141 @@
-import re
+import os
 import PyPDF2
-from typing import List, Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Any, Callable, Dict, Iterator, Optional, Tuple
+from src.general.Cache.pdf_text_cache import PDFTextCache
+from src.general.Chunk.chunk import ChunkedText
+from src.general.CleanerText.clean_text import TextCleaner
+from src.general.ExtractText.extract_text import PDFPageStream, spread_page_order
+from src.general.TokenCounter.token_counter import BUDGET_CHARS_PER_TOKEN
+
+
+def _extract_page_range(filename: str, start: int, end: int,
+                        transform: Optional[Callable[[str], str]] = None) -> List[str]:
+    """
+    Extrai o texto de um intervalo de páginas do PDF. Executada em um processo separado:
+    cada worker abre o próprio arquivo, pois o PdfReader não pode ser compartilhado entre processos.
+
+    :param filename: O caminho para o arquivo PDF.
+    :param start: Índice da primeira página do intervalo (inclusivo).
+    :param end: Índice da última página do intervalo (exclusivo).
+    :param transform: Função opcional aplicada ao texto de cada página (por exemplo, a limpeza).
+    :return: Lista com o texto de cada página do intervalo, na ordem original.
+    """
+    with open(filename, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        page_texts = []
+        for page_num in range(start, end):
+            page_text = reader.pages[page_num].extract_text()
+            page_texts.append(transform(page_text) if transform else page_text)
+        return page_texts
+
 
 class PDFTextExtractor:
     """
     Classe responsável por extrair texto de um arquivo PDF.
     
+    Documentos grandes são divididos em intervalos de páginas extraídos em paralelo por um
+    pool de processos; documentos pequenos seguem o caminho serial.
+    
     Métodos:
-        __init__(self, filename: str): Inicializa a classe com o nome do arquivo PDF.
-        extract_text(self) -> List[str]: Extrai o texto de cada página do PDF e retorna como uma lista de strings.
+        __init__(self, filename: str, max_workers: Optional[int], min_pages_parallel: int): Inicializa a classe com o nome do arquivo PDF.
+        extract_text(self, transform: Optional[Callable[[str], str]]) -> List[str]: Extrai o texto de cada página do PDF e retorna como uma lista de strings.
     """
     
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, max_workers: Optional[int] = None, min_pages_parallel: int = 32):
         """
         Inicializa a classe com o caminho do arquivo PDF.
         
         :param filename: O caminho para o arquivo PDF.
+        :param max_workers: Número de processos usados na extração paralela (padrão: número de CPUs).
+            Use 1 para forçar a extração serial.
+        :param min_pages_parallel: Quantidade mínima de páginas para usar a extração paralela (padrão: 32).
         """
         self.filename = filename
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.min_pages_parallel = min_pages_parallel
+
+    def _page_ranges(self, num_pages: int, workers: int) -> List[Tuple[int, int]]:
+        """
+        Divide as páginas do documento em intervalos contíguos, um por worker.
+        
+        :param num_pages: Número total de páginas do PDF.
+        :param workers: Número de workers disponíveis.
+        :return: Lista de tuplas (início, fim) cobrindo todas as páginas em ordem.
+        """
+        base, remainder = divmod(num_pages, workers)
+        ranges = []
+        start = 0
+        for worker in range(workers):
+            end = start + base + (1 if worker < remainder else 0)
+            ranges.append((start, end))
+            start = end
+        return ranges
 
-    def extract_text(self) -> List[str]:
+    def _extract_text_parallel(self, num_pages: int, transform: Optional[Callable[[str], str]] = None) -> List[str]:
+        """
+        Extrai o texto das páginas em paralelo, preservando a ordem original das páginas.
+        
+        :param num_pages: Número total de páginas do PDF.
+        :param transform: Função opcional aplicada ao texto de cada página dentro dos workers.
+        :return: Uma lista onde cada item é o texto de uma página do PDF.
+        """
+        workers = min(self.max_workers, num_pages)
+        starts, ends = zip(*self._page_ranges(num_pages, workers))
+        text_by_page = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for page_texts in executor.map(_extract_page_range, repeat(self.filename), starts, ends, repeat(transform)):
+                text_by_page.extend(page_texts)
+        return text_by_page
+
+    def extract_text(self, transform: Optional[Callable[[str], str]] = None) -> List[str]:
         """
         Extrai o texto de cada página do PDF.
         
+        :param transform: Função opcional aplicada ao texto de cada página logo após a extração,
+            evitando manter a lista de textos brutos em memória.
         :return: Uma lista onde cada item é o texto de uma página do PDF.
         """
         text_by_page = []
         try:
             with open(self.filename, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(reader.pages)):
+                num_pages = len(reader.pages)
+                if self.max_workers > 1 and num_pages >= self.min_pages_parallel:
+                    return self._extract_text_parallel(num_pages, transform)
+                for page_num in range(num_pages):
                     page_text = reader.pages[page_num].extract_text()
-                    text_by_page.append(page_text)
+                    text_by_page.append(transform(page_text) if transform else page_text)
         except Exception as e:
             print(f"Erro ao ler o PDF: {e}")
         return text_by_page
 
 
-class TextCleaner:
-    """
-    Classe responsável por limpar e formatar o texto extraído de um PDF usando regex.
-    
-    Métodos:
-        __init__(self): Inicializa a classe sem parâmetros.
-        clean_text(self, text: str) -> str: Aplica regras de limpeza em uma string.
-        clean_text_list(self, texts: List[str]) -> List[str]: Aplica a limpeza em uma lista de strings.
-    """
-    
-    def __init__(self):
-        """
-        Inicializa a classe TextCleaner.
-        """
-        pass
-    
-    def clean_text(self, text: str) -> str:
-        """
-        Aplica regex para limpar e formatar o texto.
-        
-        :param text: O texto a ser limpo.
-        :return: O texto limpo e formatado.
-        """
-        # Remove múltiplos espaços em branco
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove caracteres especiais indesejados, mantendo pontuações básicas
-        text = re.sub(r'[^\w\s,.!?]', '', text)
-        
-        # Remove espaços extras no início e no fim
-        text = text.strip()
-        
-        return text
-
-    def clean_text_list(self, texts: List[str]) -> List[str]:
-        """
-        Limpa uma lista de textos.
-        
-        :param texts: Lista de textos para limpar.
-        :return: Lista de textos limpos.
-        """
-        return [self.clean_text(text) for text in texts]
-
-
 class PDFTextProcessingPipeline:
     """
     Classe responsável por integrar o processo de extração e limpeza de texto de um PDF.
     
     Métodos:
-        __init__(self, filename: str): Inicializa a classe com o nome do arquivo PDF.
+        __init__(self, filename: str, max_workers: Optional[int], cache: Optional[PDFTextCache]): Inicializa a classe com o nome do arquivo PDF.
         process_pdf(self) -> List[str]: Extrai e limpa o texto de um PDF e retorna uma lista de strings limpas.
+        process_pdf_with_budget(self, max_chars: Optional[int], max_tokens: Optional[int], sample_evenly: bool) -> List[str]: Extrai apenas o texto que cabe no orçamento.
+        iter_pages(self) -> Iterator[Tuple[int, str, str]]: Percorre o PDF página a página, extraindo e limpando sob demanda.
+        iter_chunks(self, chunk_size: int, overlap: int) -> Iterator[Dict[str, Any]]: Gera os chunks do texto limpo de forma preguiçosa.
     """
     
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, max_workers: Optional[int] = None, cache: Optional[PDFTextCache] = None):
         """
         Inicializa o pipeline com o caminho para o arquivo PDF.
         
         :param filename: O caminho do arquivo PDF.
+        :param max_workers: Número de processos para a extração paralela (padrão: número de CPUs).
+        :param cache: Cache opcional do texto limpo; em caso de acerto a extração é ignorada.
         """
         self.filename = filename
-        self.extractor = PDFTextExtractor(filename)
+        self.extractor = PDFTextExtractor(filename, max_workers=max_workers)
         self.cleaner = TextCleaner()
+        self.cache = cache
 
     def process_pdf(self) -> List[str]:
         """
@@ -106,13 +143,96 @@ class PDFTextProcessingPipeline:
         
         :return: Lista de strings com o texto limpo e formatado.
         """
-        # Extrair o texto do PDF
-        raw_text_list = self.extractor.extract_text()
+        # Consultar o cache pelo conteúdo do arquivo e pela versão do limpador
+        cache_key = self._cache_key()
+        if cache_key is not None:
+            cached_text_list = self.cache.get_pages(cache_key)
+            if cached_text_list is not None:
+                return cached_text_list
+
+        # Extrair e limpar o texto do PDF página a página, sem manter a lista de textos brutos
+        cleaned_text_list = self.extractor.extract_text(transform=self.cleaner.clean_text)
 
-        # Limpar o texto extraído
-        cleaned_text_list = self.cleaner.clean_text_list(raw_text_list)
+        # Armazenar no cache apenas extrações bem-sucedidas
+        if cache_key is not None and cleaned_text_list:
+            self.cache.put_pages(cache_key, cleaned_text_list)
 
         return cleaned_text_list
 
+    def process_pdf_with_budget(self, max_chars: Optional[int] = None, max_tokens: Optional[int] = None,
+                                sample_evenly: bool = False) -> List[str]:
+        """
+        Extrai e limpa apenas o texto que cabe no orçamento, lendo as páginas sob demanda e
+        interrompendo a leitura do PDF assim que o orçamento é atingido.
+        
+        :param max_chars: Orçamento em caracteres do texto retornado.
+        :param max_tokens: Orçamento em tokens, convertido para caracteres (BUDGET_CHARS_PER_TOKEN) quando max_chars não é informado.
+        :param sample_evenly: Se True, seleciona páginas espalhadas pelo documento em vez de apenas as primeiras.
+        :return: Lista de strings com o texto limpo das páginas selecionadas, na ordem do documento.
+        :raises ValueError: Se nenhum orçamento for informado.
+        """
+        if max_chars is None and max_tokens is None:
+            raise ValueError("Informe max_chars ou max_tokens para a extração com orçamento.")
+        remaining = max_chars if max_chars is not None else max_tokens * BUDGET_CHARS_PER_TOKEN
+
+        # Reaproveita o texto já limpo no cache, quando disponível, sem abrir o PDF
+        cache_key = self._cache_key()
+        cached_text_list = self.cache.get_pages(cache_key) if cache_key is not None else None
+        if cached_text_list is not None:
+            page_order = spread_page_order(len(cached_text_list)) if sample_evenly else range(len(cached_text_list))
+            pages = ((page_num + 1, cached_text_list[page_num]) for page_num in page_order)
+        else:
+            stream = PDFPageStream(self.filename, cleaner=self.cleaner.clean_text, sample_evenly=sample_evenly)
+            pages = ((page_number, cleaned_text) for page_number, _, cleaned_text in stream)
+
+        selected = {}
+        try:
+            for page_number, cleaned_text in pages:
+                if remaining <= 0:
+                    break
+                selected[page_number] = cleaned_text[:remaining]
+                # Desconta também o espaço usado para unir as páginas
+                remaining -= len(selected[page_number]) + 1
+        except Exception as e:
+            print(f"Erro ao ler o PDF: {e}")
+        finally:
+            pages.close()
+
+        return [selected[page_number] for page_number in sorted(selected)]
+
+    def _cache_key(self) -> Optional[str]:
+        """
+        Gera a chave do cache para o PDF, caso o pipeline tenha um cache configurado. Se o arquivo não
+        puder ser lido, o cache é ignorado e o erro fica a cargo do caminho sem cache.
+        
+        :return: A chave do cache ou None quando não há cache ou o arquivo não pôde ser lido.
+        """
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.make_key(self.filename, self.cleaner.VERSION)
+        except OSError as e:
+            print(f"Erro ao ler o PDF para o cache: {e}")
+            return None
+
+    def iter_pages(self) -> Iterator[Tuple[int, str, str]]:
+        """
+        Percorre o PDF página a página, extraindo e limpando o texto sob demanda.
+        
+        :return: Iterador de tuplas (número da página, texto bruto, texto limpo).
+        """
+        return iter(PDFPageStream(self.filename, cleaner=self.cleaner.clean_text))
+
+    def iter_chunks(self, chunk_size: int, overlap: int) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os chunks do texto limpo consumindo as páginas de forma preguiçosa.
+        
+        :param chunk_size: Tamanho de cada chunk em caracteres.
+        :param overlap: Sobreposição entre chunks consecutivos em caracteres.
+        :return: Iterador com a estrutura de cada chunk.
+        """
+        chunker = ChunkedText([], chunk_size, overlap)
+        return chunker.chunk_pages(self.iter_pages(), filename=self.filename)
+
 
 
@@ -0,0 +1,289 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Classificações de erro retornadas pelos classificadores de cada provedor
+THROTTLE = "throttle"   # O provedor pediu para reduzir o ritmo: tenta novamente e reduz a taxa
+RETRY = "retry"         # Falha transitória: tenta novamente
+FAIL = "fail"           # Falha definitiva: propaga o erro imediatamente
+
+
+class CircuitOpenError(Exception):
+    """Erro lançado quando o circuito do provedor está aberto e a chamada nem chega a ser feita."""
+
+
+class RetryPolicy:
+    """
+    Política de backoff exponencial com jitter completo: a espera antes da tentativa n é sorteada
+    entre 0 e min(max_delay, base_delay * 2 ** n).
+    
+    Métodos:
+        __init__(self, max_attempts: int, base_delay: float, max_delay: float): Inicializa a política.
+        delay(self, attempt: int) -> float: Retorna a espera, em segundos, antes da próxima tentativa.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 20.0):
+        """
+        :param max_attempts: Número máximo de tentativas, incluindo a primeira (padrão: 5).
+        :param base_delay: Espera base em segundos (padrão: 0.5).
+        :param max_delay: Espera máxima em segundos (padrão: 20).
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """
+        :param attempt: Número de tentativas já falhas (começando em 1).
+        :return: A espera em segundos.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket cuja taxa se adapta aos sinais de throttling do provedor (AIMD): cada sucesso
+    aumenta a taxa de forma aditiva e cada throttling a reduz de forma multiplicativa.
+    
+    Métodos:
+        __init__(self, rate: float, min_rate: float, max_rate: float, increase: float, decrease: float): Inicializa o limitador.
+        acquire(self): Bloqueia até haver um token disponível.
+        on_success(self): Aumenta a taxa de forma aditiva.
+        on_throttle(self): Reduz a taxa de forma multiplicativa e esvazia o bucket.
+    """
+
+    def __init__(self, rate: float = 10.0, min_rate: float = 0.2, max_rate: float = 50.0,
+                 increase: float = 0.1, decrease: float = 0.5):
+        """
+        :param rate: Taxa inicial, em chamadas por segundo (padrão: 10).
+        :param min_rate: Taxa mínima (padrão: 0.2).
+        :param max_rate: Taxa máxima (padrão: 50).
+        :param increase: Incremento aditivo da taxa a cada sucesso (padrão: 0.1).
+        :param decrease: Fator multiplicativo aplicado à taxa a cada throttling (padrão: 0.5).
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = max(1.0, rate)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Adiciona os tokens acumulados desde a última recarga (com a capacidade de 1 segundo de taxa)"""
+        now = time.monotonic()
+        self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """
+        Bloqueia até haver um token disponível e o consome.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Aumenta a taxa de forma aditiva, até a taxa máxima"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        """Reduz a taxa de forma multiplicativa, até a taxa mínima, e esvazia o bucket"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+
+
+class RetryBudget:
+    """
+    Orçamento de retries: cada chamada deposita uma fração de token e cada retry consome um token inteiro,
+    limitando os retries a uma proporção das chamadas e evitando tempestades de retries sob falha generalizada.
+    
+    Métodos:
+        __init__(self, ratio: float, min_retries: int): Inicializa o orçamento.
+        record_request(self): Registra uma chamada.
+        try_spend(self) -> bool: Consome um token de retry, se houver.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        """
+        :param ratio: Proporção de retries permitida em relação às chamadas (padrão: 0.2).
+        :param min_retries: Retries sempre disponíveis, também usados como capacidade máxima (padrão: 10).
+        """
+        self.ratio = ratio
+        self.capacity = float(min_retries)
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """Registra uma chamada, depositando ratio tokens"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """
+        :return: True se havia um token de retry disponível (e ele foi consumido).
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker: após failure_threshold falhas consecutivas o circuito abre e as chamadas falham
+    imediatamente; depois de reset_timeout segundos uma única chamada de teste é liberada (meio-aberto).
+    
+    Métodos:
+        __init__(self, failure_threshold: int, reset_timeout: float): Inicializa o circuito fechado.
+        allow(self) -> bool: Indica se uma chamada pode ser feita.
+        record_success(self): Fecha o circuito.
+        record_failure(self): Registra uma falha e abre o circuito quando necessário.
+        release_probe(self): Libera a chamada de teste sem contar sucesso nem falha.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        :param failure_threshold: Falhas consecutivas para abrir o circuito (padrão: 5).
+        :param reset_timeout: Segundos até liberar uma chamada de teste (padrão: 30).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        :return: True se a chamada pode ser feita.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Fecha o circuito e zera as falhas consecutivas"""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        """Registra uma falha; abre o circuito ao atingir o limite ou se a chamada de teste falhar"""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Devolve a vaga da chamada de teste quando ela terminou com um erro que não indica falha do provedor"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class ResilientCaller:
+    """
+    Classe responsável por executar as chamadas a um provedor com limitação de taxa adaptativa,
+    retries com backoff e jitter, orçamento de retries e circuit breaker.
+    
+    Métodos:
+        __init__(self, provider: str, classify: Callable[[Exception], str], ...): Inicializa os componentes do provedor.
+        call(self, func: Callable, *args, max_attempts: Optional[int] = None, **kwargs) -> Any: Executa a chamada.
+    """
+
+    def __init__(self, provider: str, classify: Callable[[Exception], str], policy: Optional[RetryPolicy] = None,
+                 limiter: Optional[AdaptiveRateLimiter] = None, budget: Optional[RetryBudget] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        :param provider: O nome do provedor (usado nas mensagens).
+        :param classify: Função que classifica um erro do provedor como THROTTLE, RETRY ou FAIL.
+        :param policy: A política de retries (padrão: RetryPolicy()).
+        :param limiter: O limitador de taxa (padrão: AdaptiveRateLimiter()).
+        :param budget: O orçamento de retries (padrão: RetryBudget()).
+        :param breaker: O circuit breaker (padrão: CircuitBreaker()).
+        """
+        self.provider = provider
+        self.classify = classify
+        self.policy = policy if policy is not None else RetryPolicy()
+        self.limiter = limiter if limiter is not None else AdaptiveRateLimiter()
+        self.budget = budget if budget is not None else RetryBudget()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def call(self, func: Callable, *args, max_attempts: Optional[int] = None, **kwargs) -> Any:
+        """
+        Executa a chamada ao provedor aplicando os controles de taxa e de falha. Apenas falhas transitórias
+        (RETRY ou THROTTLE) que esgotam as tentativas contam para o circuit breaker.
+        
+        :param func: A função que faz a chamada.
+        :param max_attempts: Número máximo de tentativas (padrão: o da política).
+        :return: O valor retornado pela função.
+        :raises CircuitOpenError: Se o circuito do provedor estiver aberto.
+        """
+        max_attempts = max_attempts if max_attempts is not None else self.policy.max_attempts
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuito aberto para o provedor {self.provider}; chamada não realizada.")
+
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                attempt += 1
+                kind = self.classify(e)
+                if kind == THROTTLE:
+                    self.limiter.on_throttle()
+                if kind == FAIL:
+                    # Erros definitivos (validação, voz inexistente) são do chamador, não indisponibilidade do provedor
+                    self.breaker.release_probe()
+                    raise
+                if attempt >= max_attempts or not self.budget.try_spend():
+                    self.breaker.record_failure()
+                    raise
+                delay = self.policy.delay(attempt)
+                print(f"Tentativa {attempt} de {max_attempts} ({self.provider}) falhou: {e}. Tentando novamente em {delay:.1f} segundos...")
+                time.sleep(delay)
+                continue
+            self.limiter.on_success()
+            self.breaker.record_success()
+            return result
+
+
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+
+def get_resilient_caller(provider: str, classify: Callable[[Exception], str]) -> ResilientCaller:
+    """
+    Retorna o ResilientCaller compartilhado pelo processo para o provedor, criando-o na primeira chamada,
+    de forma que todas as instâncias dos geradores dividam o mesmo limitador, orçamento e circuito.
+    
+    :param provider: O nome do provedor.
+    :param classify: Função que classifica os erros do provedor.
+    :return: O ResilientCaller do provedor.
+    """
+    with _callers_lock:
+        if provider not in _callers:
+            _callers[provider] = ResilientCaller(provider, classify)
+        return _callers[provider]
@@ -0,0 +1,153 @@
+import json
+import math
+import threading
+from typing import Dict
+
+# Aproximação offline de caracteres por token para os modelos Claude.
+CHARS_PER_TOKEN = 4
+
+# Razão conservadora usada quando a estimativa é um limite rígido (orçamentos e janela de contexto):
+# textos em português e espanhol, com acentos, rendem menos caracteres por token que o inglês.
+BUDGET_CHARS_PER_TOKEN = 3
+
+# Fração da janela de contexto considerada utilizável, como margem de segurança para os erros da estimativa.
+CONTEXT_SAFETY_FRACTION = 0.9
+
+# Tokens adicionados pela estrutura da Messages API (papel, delimitadores) a cada mensagem.
+MESSAGE_OVERHEAD_TOKENS = 10
+
+# Janela de contexto, em tokens, do Claude 3 Sonnet.
+CLAUDE3_CONTEXT_TOKENS = 200000
+
+# Tamanho, em caracteres, dos trechos usados na amostragem espalhada de fit_to_token_budget.
+SAMPLE_WINDOW_CHARS = 2000
+
+
+def estimate_tokens(text: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    """
+    Estima, sem acesso à rede, o número de tokens de um texto.
+    
+    :param text: O texto a ser estimado.
+    :param chars_per_token: Caracteres por token (padrão: CHARS_PER_TOKEN; use BUDGET_CHARS_PER_TOKEN para limites).
+    :return: O número estimado de tokens.
+    """
+    return math.ceil(len(text) / chars_per_token)
+
+
+def estimate_prompt_tokens(prompt: str, chars_per_token: float = CHARS_PER_TOKEN) -> int:
+    """
+    Estima, sem acesso à rede, os tokens de entrada de um prompt enviado como uma única mensagem de usuário.
+    
+    :param prompt: O prompt a ser enviado.
+    :param chars_per_token: Caracteres por token (padrão: CHARS_PER_TOKEN).
+    :return: O número estimado de tokens de entrada.
+    """
+    return estimate_tokens(prompt, chars_per_token) + MESSAGE_OVERHEAD_TOKENS
+
+
+def fit_to_token_budget(text: str, max_tokens: int, sample_evenly: bool = False) -> str:
+    """
+    Reduz o texto para caber no orçamento de tokens. Por padrão mantém o início do texto, cortando
+    em um limite de palavra; com sample_evenly, mantém trechos espalhados por todo o texto.
+    O orçamento é convertido em caracteres pela razão conservadora BUDGET_CHARS_PER_TOKEN.
+    
+    :param text: O texto a ser reduzido.
+    :param max_tokens: O orçamento em tokens.
+    :param sample_evenly: Se True, o orçamento é preenchido com trechos espalhados pelo texto.
+    :return: O texto original, se couber no orçamento, ou o texto reduzido.
+    """
+    max_chars = max(max_tokens, 0) * BUDGET_CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    if not sample_evenly or max_chars < 2 * SAMPLE_WINDOW_CHARS:
+        cut = text.rfind(' ', 0, max_chars + 1)
+        return text[:cut if cut > 0 else max_chars]
+
+    # Agrupa as palavras em trechos de ~SAMPLE_WINDOW_CHARS e escolhe trechos igualmente espaçados
+    windows, current, current_len = [], [], 0
+    for word in text.split():
+        current.append(word)
+        current_len += len(word) + 1
+        if current_len >= SAMPLE_WINDOW_CHARS:
+            windows.append(' '.join(current))
+            current, current_len = [], 0
+    if current:
+        windows.append(' '.join(current))
+
+    keep = max(1, max_chars // (SAMPLE_WINDOW_CHARS + 100))
+    step = len(windows) / keep
+    selected = [windows[int(i * step)] for i in range(min(keep, len(windows)))]
+    return fit_to_token_budget(' '.join(selected), max_tokens)
+
+
+class TokenUsageTracker:
+    """
+    Classe responsável por acumular, por etapa do pipeline, os tokens de entrada e saída e a latência
+    das chamadas ao modelo. É thread-safe, pois as etapas fazem chamadas em paralelo.
+    
+    Métodos:
+        record(self, stage: str, input_tokens: int, output_tokens: int, latency_seconds: float, cached: bool): Registra uma chamada.
+        totals(self) -> Dict[str, Dict[str, float]]: Retorna os totais por etapa.
+        report(self): Exibe os totais por etapa.
+        export(self, filename: str): Salva os totais por etapa em um arquivo JSON.
+        reset(self): Descarta os totais acumulados.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, input_tokens: int = 0, output_tokens: int = 0,
+               latency_seconds: float = 0.0, cached: bool = False):
+        """
+        Registra uma chamada ao modelo.
+        
+        :param stage: O nome da etapa do pipeline (e.g., "story", "image_prompt").
+        :param input_tokens: Tokens de entrada informados pelo modelo.
+        :param output_tokens: Tokens de saída informados pelo modelo.
+        :param latency_seconds: Latência da chamada em segundos.
+        :param cached: Se True, a resposta veio do cache e nenhum token foi consumido.
+        """
+        with self._lock:
+            stage_totals = self._totals.setdefault(stage, {
+                "calls": 0, "cache_hits": 0, "input_tokens": 0, "output_tokens": 0, "latency_seconds": 0.0
+            })
+            stage_totals["calls"] += 1
+            if cached:
+                stage_totals["cache_hits"] += 1
+            stage_totals["input_tokens"] += input_tokens
+            stage_totals["output_tokens"] += output_tokens
+            stage_totals["latency_seconds"] += latency_seconds
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: Cópia dos totais por etapa.
+        """
+        with self._lock:
+            return {stage: dict(stage_totals) for stage, stage_totals in self._totals.items()}
+
+    def report(self):
+        """Exibe os totais de tokens e latência de cada etapa"""
+        for stage, stage_totals in self.totals().items():
+            print(f"[{stage}] chamadas: {stage_totals['calls']} (cache: {stage_totals['cache_hits']}), "
+                  f"tokens de entrada: {stage_totals['input_tokens']}, tokens de saída: {stage_totals['output_tokens']}, "
+                  f"latência: {stage_totals['latency_seconds']:.1f}s")
+
+    def export(self, filename: str):
+        """
+        Salva os totais por etapa em um arquivo JSON.
+        
+        :param filename: O nome do arquivo.
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.totals(), f, indent=4)
+
+    def reset(self):
+        """Descarta os totais acumulados"""
+        with self._lock:
+            self._totals.clear()
+
+
+# Contabilização compartilhada por todas as chamadas ao modelo no processo
+token_usage = TokenUsageTracker()
@@ -0,0 +1,31 @@
+import glob
+import os
+import re
+import pytest
+from src.general.CleanerText.clean_text import TextCleaner
+
+PyPDF2 = pytest.importorskip("PyPDF2")
+
+DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "documents")
+PDF_FILES = sorted(glob.glob(os.path.join(DOCUMENTS_DIR, "*.pdf")))
+
+
+def reference_clean_text(text: str) -> str:
+    """Limpador anterior: dois re.sub não compilados"""
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s,.!?]', '', text)
+    return text.strip()
+
+
+def test_documents_available():
+    assert PDF_FILES, "Nenhum PDF encontrado em src/documents"
+
+
+@pytest.mark.parametrize("filename", PDF_FILES, ids=os.path.basename)
+def test_clean_text_matches_previous_cleaner(filename):
+    pages = [page.extract_text() for page in PyPDF2.PdfReader(filename).pages]
+    expected = [reference_clean_text(page).encode('utf-8') for page in pages]
+
+    cleaner = TextCleaner()
+    assert [page.encode('utf-8') for page in cleaner.clean_text_list(pages)] == expected
+    assert [[page.encode('utf-8') for page in document] for document in cleaner.clean_many([pages, pages], max_workers=2)] == [expected, expected]